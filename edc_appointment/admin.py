@@ -1,8 +1,9 @@
+from django.conf import settings
 from django.contrib import admin
 from django.utils.safestring import mark_safe
 from edc_model_admin import audit_fieldset_tuple, SimpleHistoryAdmin
 from edc_model_admin.dashboard import ModelAdminSubjectDashboardMixin
-from edc_visit_schedule import off_schedule_or_raise, OnScheduleError
+from edc_visit_schedule import site_visit_schedules
 from edc_visit_schedule.fieldsets import (
     visit_schedule_fieldset_tuple,
     visit_schedule_fields,
@@ -11,7 +12,9 @@ from edc_visit_schedule.fieldsets import (
 from .admin_site import edc_appointment_admin
 from .constants import NEW_APPT
 from .forms import AppointmentForm
+from .list_filters import VisitCodeListFilter
 from .models import Appointment
+from .paginators import EstimatedCountPaginator
 
 
 @admin.register(Appointment, site=edc_appointment_admin)
@@ -19,8 +22,16 @@ class AppointmentAdmin(ModelAdminSubjectDashboardMixin, SimpleHistoryAdmin):
 
     show_cancel = True
 
+    # for large appointment tables; estimated counts, visit code
+    # choices from the visit schedules and no date hierarchy
+    # drill-down above `date_hierarchy_max_count` rows. If None,
+    # read from settings.EDC_APPOINTMENT_ADMIN_PERFORMANCE_MODE.
+    performance_mode = None
+    date_hierarchy_max_count = 50000
+
     form = AppointmentForm
     date_hierarchy = "appt_datetime"
+    list_select_related = ("site",)
     list_display = (
         "subject_identifier",
         "__str__",
@@ -80,6 +91,38 @@ class AppointmentAdmin(ModelAdminSubjectDashboardMixin, SimpleHistoryAdmin):
 
     search_fields = ("subject_identifier",)
 
+    def is_performance_mode(self):
+        if self.performance_mode is None:
+            return getattr(settings, "EDC_APPOINTMENT_ADMIN_PERFORMANCE_MODE", False)
+        return self.performance_mode
+
+    @property
+    def show_full_result_count(self):
+        return not self.is_performance_mode()
+
+    def get_paginator(self, request, queryset, per_page, **kwargs):
+        if self.is_performance_mode():
+            return EstimatedCountPaginator(queryset, per_page, **kwargs)
+        return super().get_paginator(request, queryset, per_page, **kwargs)
+
+    def get_list_filter(self, request):
+        list_filter = super().get_list_filter(request)
+        if self.is_performance_mode():
+            list_filter = [
+                VisitCodeListFilter if f == "visit_code" else f for f in list_filter
+            ]
+        return list_filter
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        self.get_schedule_datetimes(request, changelist.result_list)
+        if (
+            self.is_performance_mode()
+            and changelist.result_count > self.date_hierarchy_max_count
+        ):
+            changelist.date_hierarchy = None
+        return changelist
+
     def get_readonly_fields(self, request, obj=None):
         readonly_fields = super().get_readonly_fields(request, obj=obj)
         return (
@@ -94,24 +137,75 @@ class AppointmentAdmin(ModelAdminSubjectDashboardMixin, SimpleHistoryAdmin):
             ]
         )
 
+    def get_schedule_datetimes(self, request, appointments=None):
+        """Returns a dictionary of (onschedule_datetime,
+        offschedule_datetime) by (visit_schedule_name, schedule_name,
+        subject_identifier) cached on the request.
+
+        Subjects of `appointments` not yet in the dictionary are
+        loaded with one query per on/off schedule model.
+        """
+        try:
+            schedule_datetimes = request.appointment_schedule_datetimes
+        except AttributeError:
+            schedule_datetimes = {}
+            request.appointment_schedule_datetimes = schedule_datetimes
+        missing = {}
+        for obj in appointments or []:
+            key = (obj.visit_schedule_name, obj.schedule_name, obj.subject_identifier)
+            if key not in schedule_datetimes:
+                missing.setdefault(key[:2], set()).add(key[2])
+        for (visit_schedule_name, schedule_name), subjects in missing.items():
+            schedule = site_visit_schedules.get_visit_schedule(
+                visit_schedule_name
+            ).schedules.get(schedule_name)
+            onschedule_datetimes = dict(
+                schedule.onschedule_model_cls.objects.filter(
+                    subject_identifier__in=subjects
+                ).values_list("subject_identifier", "onschedule_datetime")
+            )
+            offschedule_datetimes = dict(
+                schedule.offschedule_model_cls.objects.filter(
+                    subject_identifier__in=subjects
+                ).values_list("subject_identifier", "offschedule_datetime")
+            )
+            for subject_identifier in subjects:
+                schedule_datetimes[
+                    (visit_schedule_name, schedule_name, subject_identifier)
+                ] = (
+                    onschedule_datetimes.get(subject_identifier),
+                    offschedule_datetimes.get(subject_identifier),
+                )
+        return schedule_datetimes
+
+    def is_onschedule(self, request, obj):
+        """Returns True if the subject is on schedule on the
+        appointment date.
+
+        Same rule as `SubjectSchedule.onschedule_or_raise()`, used by
+        `edc_visit_schedule.off_schedule_or_raise()`: until taken off
+        schedule, a subject put on schedule is on schedule for any
+        date.
+        """
+        onschedule_datetime, offschedule_datetime = self.get_schedule_datetimes(
+            request, [obj]
+        )[(obj.visit_schedule_name, obj.schedule_name, obj.subject_identifier)]
+        if not offschedule_datetime:
+            return onschedule_datetime is not None
+        return onschedule_datetime <= obj.appt_datetime <= offschedule_datetime
+
     def has_delete_permission(self, request, obj=None):
         """Override to remove delete permissions if OnSchedule
         and visit_code_sequence == 0.
 
-        See `edc_visit_schedule.off_schedule_or_raise()`
+        Schedule datetimes for the changelist page are loaded
+        together, see `get_schedule_datetimes`.
         """
         has_delete_permission = super().has_delete_permission(request, obj=obj)
         if has_delete_permission and obj:
             if obj.visit_code_sequence == 0 or (
                 obj.visit_code_sequence != 0 and obj.appt_status != NEW_APPT
             ):
-                try:
-                    off_schedule_or_raise(
-                        subject_identifier=obj.subject_identifier,
-                        report_datetime=obj.appt_datetime,
-                        visit_schedule_name=obj.visit_schedule_name,
-                        schedule_name=obj.schedule_name,
-                    )
-                except OnScheduleError:
+                if self.is_onschedule(request, obj):
                     has_delete_permission = False
         return has_delete_permission
@@ -35,3 +35,63 @@ class AppointmentConfig:
         return getattr(
             self.model_cls, self.related_visit_model_attr
         ).related.related_model
+
+
+class AppointmentRegistry:
+
+    """A registry of appointment configs and appointment model
+    classes resolved once by name.
+
+    Cleared on app registry changes. See `signals`.
+    """
+
+    def __init__(self):
+        self._configs = {}
+        self._model_classes = {}
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}()"
+
+    def get_config(self, name=None):
+        """Returns the AppointmentConfig instance for this name from
+        edc_appointment.AppConfig "configurations".
+
+        If there is only one config and name is None, returns it.
+        """
+        try:
+            appointment_config = self._configs[name]
+        except KeyError:
+            app_config = django_apps.get_app_config("edc_appointment")
+            try:
+                appointment_config = [
+                    a for a in app_config.configurations if a.name == name
+                ][0]
+            except IndexError as e:
+                if len(app_config.configurations) == 1 and not name:
+                    appointment_config = app_config.configurations[0]
+                else:
+                    config_names = [a.name for a in app_config.configurations]
+                    raise AppointmentConfigError(
+                        f"Error looking up appointment config for {name}. "
+                        f"Got {e}. AppoinmentConfigs exist for {config_names}. "
+                        f"See {app_config.configurations}. See also the visit schedule."
+                    )
+            self._configs[name] = appointment_config
+        return appointment_config
+
+    def get_model_cls(self, name=None):
+        """Returns the appointment model class for this label_lower.
+        """
+        try:
+            model_cls = self._model_classes[name]
+        except KeyError:
+            model_cls = django_apps.get_model(name)
+            self._model_classes[name] = model_cls
+        return model_cls
+
+    def clear(self):
+        self._configs = {}
+        self._model_classes = {}
+
+
+appointment_registry = AppointmentRegistry()
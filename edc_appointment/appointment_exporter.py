@@ -0,0 +1,155 @@
+import csv
+import json
+
+from django.apps import apps as django_apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+
+
+class AppointmentExporterError(Exception):
+    pass
+
+
+class AppointmentExporter:
+
+    """Streams appointment rows to CSV or newline-delimited JSON.
+
+    Rows are read with `values()` and `iterator(chunk_size=...)` (a
+    server-side cursor on PostgreSQL) so memory use does not grow
+    with the number of appointments. Model instances and historical
+    records are not loaded.
+
+    For example:
+        exporter = AppointmentExporter(
+            visit_schedule_name="visit_schedule1", site_ids=[10])
+        with open("appointments.csv", "w") as f:
+            exporter.to_csv(f)
+    """
+
+    appointment_model = "edc_appointment.appointment"
+    chunk_size = 2000
+    fields = [
+        "id",
+        "subject_identifier",
+        "visit_schedule_name",
+        "schedule_name",
+        "visit_code",
+        "visit_code_sequence",
+        "timepoint",
+        "timepoint_datetime",
+        "appt_datetime",
+        "appt_type",
+        "appt_status",
+        "appt_reason",
+        "facility_name",
+        "site_id",
+        "created",
+        "modified",
+    ]
+
+    def __init__(
+        self,
+        visit_schedule_name=None,
+        schedule_name=None,
+        site_ids=None,
+        start_datetime=None,
+        end_datetime=None,
+        modified_after=None,
+        include_visit=None,
+        chunk_size=None,
+        progress=None,
+    ):
+        if schedule_name and not visit_schedule_name:
+            raise AppointmentExporterError(
+                f"Expected visit_schedule_name for schedule_name "
+                f"'{schedule_name}'. Got None"
+            )
+        self.visit_schedule_name = visit_schedule_name
+        self.schedule_name = schedule_name
+        self.site_ids = site_ids
+        self.start_datetime = start_datetime
+        self.end_datetime = end_datetime
+        self.modified_after = modified_after
+        self.include_visit = include_visit
+        self.chunk_size = chunk_size or self.chunk_size
+        # a callable that accepts the number of rows exported so far,
+        # called once per chunk.
+        self.progress = progress
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(visit_schedule_name="
+            f"{self.visit_schedule_name}, schedule_name={self.schedule_name})"
+        )
+
+    @property
+    def appointment_model_cls(self):
+        return django_apps.get_model(self.appointment_model)
+
+    @property
+    def field_names(self):
+        if self.include_visit:
+            return self.fields + ["has_visit"]
+        return self.fields
+
+    @property
+    def queryset(self):
+        """Returns a values queryset of appointments for the
+        export criteria ordered by primary key.
+        """
+        options = {}
+        if self.visit_schedule_name:
+            options.update(visit_schedule_name=self.visit_schedule_name)
+        if self.schedule_name:
+            options.update(schedule_name=self.schedule_name)
+        if self.site_ids:
+            options.update(site_id__in=self.site_ids)
+        if self.start_datetime:
+            options.update(appt_datetime__gte=self.start_datetime)
+        if self.end_datetime:
+            options.update(appt_datetime__lt=self.end_datetime)
+        if self.modified_after:
+            options.update(modified__gt=self.modified_after)
+        queryset = self.appointment_model_cls.objects.filter(**options)
+        if self.include_visit:
+            queryset = queryset.annotate(has_visit=F("has_visit_report"))
+        return queryset.order_by("pk").values(*self.field_names)
+
+    def rows(self):
+        """Yields appointment rows as dictionaries.
+        """
+        count = 0
+        for row in self.queryset.iterator(chunk_size=self.chunk_size):
+            yield row
+            count += 1
+            if self.progress and count % self.chunk_size == 0:
+                self.progress(count)
+        if self.progress:
+            self.progress(count)
+
+    def to_csv(self, f):
+        """Writes rows to file object `f` as CSV and returns the
+        number of rows written.
+        """
+        count = 0
+        writer = csv.DictWriter(f, fieldnames=self.field_names)
+        writer.writeheader()
+        for row in self.rows():
+            writer.writerow(
+                {
+                    k: (v.isoformat() if hasattr(v, "isoformat") else v)
+                    for k, v in row.items()
+                }
+            )
+            count += 1
+        return count
+
+    def to_jsonl(self, f):
+        """Writes rows to file object `f` as newline-delimited JSON
+        and returns the number of rows written.
+        """
+        count = 0
+        for row in self.rows():
+            f.write(f"{json.dumps(row, cls=DjangoJSONEncoder)}\n")
+            count += 1
+        return count
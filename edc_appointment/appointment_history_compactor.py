@@ -0,0 +1,211 @@
+import json
+
+from django.apps import apps as django_apps
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from edc_visit_schedule import site_visit_schedules
+
+
+class AppointmentHistoryCompactorError(Exception):
+    pass
+
+
+class AppointmentHistoryCompactor:
+
+    """Compacts and archives the historical appointment table.
+
+    * `compact` deletes "~" historical records that change nothing
+      but timestamp, hostname, device or revision audit fields
+      compared to the previous record of the same appointment. The
+      user fields, the history user and the change reason are
+      compared so changes by another user or with a reason are kept;
+    * `archive` writes the historical records of subjects taken off
+      schedule before a cutoff to newline-delimited JSON and deletes
+      them.
+
+    Rows are read with `values()` in pages of `chunk_size` using
+    keyset pagination, so memory use does not grow with the size of
+    the table. Each page is deleted in its own transaction.
+
+    For example:
+        compactor = AppointmentHistoryCompactor()
+        compactor.compact()
+        with open("appointment_history.jsonl", "w") as f:
+            compactor.archive(f, before=datetime(2019, 1, 1))
+    """
+
+    appointment_model = "edc_appointment.appointment"
+    chunk_size = 2000
+    audit_fields = [
+        "created",
+        "modified",
+        "hostname_created",
+        "hostname_modified",
+        "device_created",
+        "device_modified",
+        "revision",
+    ]
+    # compared by `compact` in addition to `tracked_fields`
+    history_fields = ["history_user_id", "history_change_reason"]
+
+    def __init__(
+        self, appointment_model=None, chunk_size=None, dry_run=None, progress=None
+    ):
+        self.appointment_model = appointment_model or self.appointment_model
+        self.chunk_size = chunk_size or self.chunk_size
+        self.dry_run = dry_run
+        # a callable that accepts the number of rows read so far,
+        # called once per page.
+        self.progress = progress
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(chunk_size={self.chunk_size})"
+
+    @property
+    def appointment_model_cls(self):
+        return django_apps.get_model(self.appointment_model)
+
+    @property
+    def history_model_cls(self):
+        manager_name = getattr(
+            self.appointment_model_cls._meta,
+            "simple_history_manager_attribute",
+            "history",
+        )
+        try:
+            return getattr(self.appointment_model_cls, manager_name).model
+        except AttributeError:
+            raise AppointmentHistoryCompactorError(
+                f"Model has no historical records. Got {self.appointment_model}."
+            )
+
+    @property
+    def tracked_fields(self):
+        """Returns the names of the fields compared by `compact`.
+        """
+        field_names = [f.name for f in self.appointment_model_cls._meta.concrete_fields]
+        return [
+            f.name
+            for f in self.history_model_cls._meta.concrete_fields
+            if f.name in field_names and f.name not in self.audit_fields
+        ]
+
+    def pages(self, queryset, ordering, fields):
+        """Yields lists of rows from `queryset` ordered by `ordering`.
+
+        Pages after the first start after the last row of the
+        previous page, so rows deleted between pages are not
+        skipped.
+        """
+        last = None
+        count = 0
+        while True:
+            page_queryset = queryset
+            if last:
+                page_queryset = page_queryset.filter(self.after(ordering, last))
+            rows = list(
+                page_queryset.order_by(*ordering).values(*fields)[: self.chunk_size]
+            )
+            if not rows:
+                break
+            count += len(rows)
+            yield rows
+            if self.progress:
+                self.progress(count)
+            last = rows[-1]
+
+    @staticmethod
+    def after(ordering, row):
+        """Returns a Q for rows after `row` in `ordering`.
+        """
+        q = Q()
+        for index, name in enumerate(ordering):
+            options = {k: row[k] for k in ordering[:index]}
+            options.update({f"{name}__gt": row[name]})
+            q |= Q(**options)
+        return q
+
+    def delete(self, history_ids):
+        if history_ids and not self.dry_run:
+            with transaction.atomic():
+                self.history_model_cls.objects.filter(
+                    history_id__in=history_ids
+                ).delete()
+
+    def compact(self):
+        """Deletes historical records with no change and returns
+        the number deleted (or to be deleted if `dry_run`).
+        """
+        deleted = 0
+        previous = None
+        attnames = [f.attname for f in self.history_model_cls._meta.concrete_fields]
+        fields = self.tracked_fields + [
+            attname for attname in self.history_fields if attname in attnames
+        ]
+        for rows in self.pages(
+            self.history_model_cls.objects.all(),
+            ["id", "history_date", "history_id"],
+            fields + ["history_date", "history_id", "history_type"],
+        ):
+            history_ids = []
+            for row in rows:
+                values = [row[name] for name in fields]
+                if (
+                    row["history_type"] == "~"
+                    and previous
+                    and previous[0] == row["id"]
+                    and previous[1] == values
+                ):
+                    history_ids.append(row["history_id"])
+                else:
+                    previous = (row["id"], values)
+            self.delete(history_ids)
+            deleted += len(history_ids)
+        return deleted
+
+    def get_offschedule_q(self, before=None):
+        """Returns a Q for historical records of subjects taken off
+        schedule before `before`, one clause per schedule.
+        """
+        q = Q()
+        for visit_schedule in site_visit_schedules.registry.values():
+            for schedule in visit_schedule.schedules.values():
+                q |= Q(
+                    visit_schedule_name=visit_schedule.name,
+                    schedule_name=schedule.name,
+                    subject_identifier__in=(
+                        schedule.offschedule_model_cls.objects.filter(
+                            offschedule_datetime__lt=before
+                        ).values("subject_identifier")
+                    ),
+                )
+        return q
+
+    def archive(self, f, before=None):
+        """Writes historical records of subjects off schedule before
+        `before` to file object `f` as newline-delimited JSON, deletes
+        them and returns the number archived.
+
+        Each page is written and flushed before it is deleted.
+        """
+        if not before:
+            raise AppointmentHistoryCompactorError(
+                "Expected a cutoff datetime. Got None"
+            )
+        q = self.get_offschedule_q(before=before)
+        if not q:
+            return 0
+        archived = 0
+        fields = [
+            field.attname for field in self.history_model_cls._meta.concrete_fields
+        ]
+        for rows in self.pages(
+            self.history_model_cls.objects.filter(q), ["history_id"], fields
+        ):
+            for row in rows:
+                f.write(f"{json.dumps(row, cls=DjangoJSONEncoder)}\n")
+            f.flush()
+            self.delete([row["history_id"] for row in rows])
+            archived += len(rows)
+        return archived
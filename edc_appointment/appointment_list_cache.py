@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from uuid import uuid4
+
+
+class AppointmentListCache:
+
+    """A read-through cache of a subject's appointments in the
+    Django cache.
+
+    Enable by setting settings.EDC_APPOINTMENT_LIST_CACHE to a cache
+    alias, e.g. "default".
+
+    Lists are stored as tuples of field values, not pickled model
+    instances, under a key of (model, subject_identifier,
+    visit_schedule_name, schedule_name, version). The version is a
+    token per subject replaced by `bump` when an appointment or visit
+    report of the subject is saved or deleted, so stale lists are
+    never read and expire from the cache. Lists are not cached
+    inside a transaction.
+    """
+
+    key_prefix = "edc_appointment.appointments"
+    timeout = 60 * 60 * 24
+
+    @property
+    def alias(self):
+        return getattr(settings, "EDC_APPOINTMENT_LIST_CACHE", None)
+
+    @property
+    def enabled(self):
+        return bool(self.alias)
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def get_version_key(self, subject_identifier):
+        return f"{self.key_prefix}.version:{subject_identifier}"
+
+    def get_version(self, subject_identifier):
+        key = self.get_version_key(subject_identifier)
+        version = self.cache.get(key)
+        if not version:
+            version = uuid4().hex
+            if not self.cache.add(key, version, self.timeout):
+                version = self.cache.get(key) or version
+        return version
+
+    def bump(self, subject_identifier):
+        """Replaces the subject's version now and again on commit,
+        in case the list was read before the transaction committed.
+        """
+        if self.enabled and subject_identifier:
+            key = self.get_version_key(subject_identifier)
+            self.cache.set(key, uuid4().hex, self.timeout)
+            transaction.on_commit(
+                lambda: self.cache.set(key, uuid4().hex, self.timeout)
+            )
+
+    @staticmethod
+    def get_field_names(model_cls):
+        return [f.attname for f in model_cls._meta.concrete_fields]
+
+    def get_rows(
+        self,
+        model_cls,
+        subject_identifier=None,
+        visit_schedule_name=None,
+        schedule_name=None,
+    ):
+        """Returns a list of tuples of field values ordered by
+        timepoint and visit_code_sequence.
+
+        Inside a transaction the list may include changes not yet
+        committed, or miss them, so the cache is neither read nor
+        filled.
+        """
+        opts = dict(subject_identifier=subject_identifier)
+        if visit_schedule_name:
+            opts.update(visit_schedule_name=visit_schedule_name)
+        if schedule_name:
+            opts.update(schedule_name=schedule_name)
+        # read the primary, a lagging replica could fill the new
+        # version with a stale list.
+        queryset = (
+            model_cls.objects.using(DEFAULT_DB_ALIAS)
+            .filter(**opts)
+            .order_by("timepoint", "visit_code_sequence")
+            .values_list(*self.get_field_names(model_cls))
+        )
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return list(queryset)
+        key = (
+            f"{self.key_prefix}:{model_cls._meta.label_lower}:"
+            f"{subject_identifier}:{visit_schedule_name or ''}:{schedule_name or ''}:"
+            f"{self.get_version(subject_identifier)}"
+        )
+        rows = self.cache.get(key)
+        if rows is None:
+            rows = list(queryset)
+            self.cache.set(key, rows, self.timeout)
+        return rows
+
+    def get_appointments(self, model_cls, **kwargs):
+        """Returns a list of appointment instances built from the
+        cached rows.
+        """
+        field_names = self.get_field_names(model_cls)
+        return [
+            model_cls.from_db(DEFAULT_DB_ALIAS, field_names, row)
+            for row in self.get_rows(model_cls, **kwargs)
+        ]
+
+
+appointment_list_cache = AppointmentListCache()
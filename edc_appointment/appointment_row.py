@@ -0,0 +1,127 @@
+from edc_visit_schedule import site_visit_schedules
+
+from .choices import APPT_REASON, APPT_STATUS, APPT_TYPE
+
+appt_reason_labels = dict(APPT_REASON)
+appt_status_labels = dict(APPT_STATUS)
+appt_type_labels = dict(APPT_TYPE)
+
+
+class AppointmentRow:
+
+    """A compact, read-only appointment row for bulk consumers,
+    e.g. exports, reports and dashboards.
+
+    Rows hold only the values of `fields`, in `__slots__`, and
+    have no model state, audit fields or history descriptors.
+    Build rows from `values_list(*AppointmentRow.fields)` or use
+    `Appointment.objects.rows()`.
+
+    For example:
+        for row in Appointment.objects.rows(visit_schedule_name="v1"):
+            print(row.title, row.appt_status_display, row.window_upper)
+    """
+
+    fields = (
+        "id",
+        "subject_identifier",
+        "visit_schedule_name",
+        "schedule_name",
+        "visit_code",
+        "visit_code_sequence",
+        "timepoint",
+        "timepoint_datetime",
+        "appt_datetime",
+        "appt_type",
+        "appt_status",
+        "appt_reason",
+        "facility_name",
+        "site_id",
+    )
+    __slots__ = fields
+
+    def __init__(self, *values):
+        if len(values) != len(self.fields):
+            raise TypeError(
+                f"Expected {len(self.fields)} values for {self.__class__.__name__}. "
+                f"Got {len(values)}."
+            )
+        for name, value in zip(self.fields, values):
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{self.__class__.__name__} is read-only.")
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(subject_identifier={self.subject_identifier}, "
+            f"visit_code={self.visit_code}, "
+            f"visit_code_sequence={self.visit_code_sequence})"
+        )
+
+    def __str__(self):
+        return f"{self.visit_code}.{self.visit_code_sequence}"
+
+    def __eq__(self, other):
+        if isinstance(other, AppointmentRow):
+            return self.values() == other.values()
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def values(self):
+        return tuple(getattr(self, name) for name in self.fields)
+
+    def as_dict(self):
+        return dict(zip(self.fields, self.values()))
+
+    @property
+    def schedule(self):
+        return site_visit_schedules.get_visit_schedule(
+            self.visit_schedule_name
+        ).schedules.get(self.schedule_name)
+
+    @property
+    def schedule_visit(self):
+        """Returns the visit in the schedule, not a visit report.
+        """
+        return self.schedule.visits.get(self.visit_code)
+
+    @property
+    def title(self):
+        """Returns the visit title as `Appointment.title`.
+        """
+        if self.visit_code_sequence > 0:
+            return f"{self.schedule_visit.title} {self.appt_reason_display}"
+        return self.schedule_visit.title
+
+    @property
+    def appt_status_display(self):
+        return appt_status_labels.get(self.appt_status, self.appt_status)
+
+    @property
+    def appt_reason_display(self):
+        return appt_reason_labels.get(self.appt_reason, self.appt_reason)
+
+    @property
+    def appt_type_display(self):
+        return appt_type_labels.get(self.appt_type, self.appt_type)
+
+    @property
+    def window_lower(self):
+        """Returns the lower bound of the visit window, or None,
+        relative to the unadjusted timepoint_datetime.
+        """
+        if self.timepoint_datetime:
+            return self.timepoint_datetime - self.schedule_visit.rlower
+        return None
+
+    @property
+    def window_upper(self):
+        """Returns the upper bound of the visit window, or None,
+        relative to the unadjusted timepoint_datetime.
+        """
+        if self.timepoint_datetime:
+            return self.timepoint_datetime + self.schedule_visit.rupper
+        return None
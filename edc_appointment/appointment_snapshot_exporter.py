@@ -0,0 +1,199 @@
+import json
+import os
+
+from datetime import datetime, timedelta, timezone
+from django.utils.dateparse import parse_datetime
+from edc_utils import get_utcnow
+
+from .appointment_exporter import AppointmentExporter, AppointmentExporterError
+from .choices import APPT_REASON, APPT_STATUS, APPT_TYPE
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+class AppointmentSnapshotExporter(AppointmentExporter):
+
+    """Writes appointment snapshots to Parquet for analytics.
+
+    Requires `pyarrow`.
+
+    * `appt_status`, `appt_type` and `appt_reason` are dictionary
+      encoded using the choices in `choices.py`;
+    * datetimes are int64 microseconds since the epoch (UTC);
+    * files are partitioned as
+      `visit_schedule_name=<name>/schedule_name=<name>/<run>.parquet`.
+
+    If `incremental` is True, only rows modified since the last
+    export to `path`, less `watermark_overlap`, are written, as a new
+    file in each partition. The overlap re-reads rows that committed
+    after the last export with an earlier `modified`. Consumers should
+    keep the row with the latest `modified` per `id`. Deleted
+    appointments are not tracked.
+    """
+
+    watermark_filename = "_last_modified.json"
+    # longer than the longest transaction that saves appointments
+    watermark_overlap = timedelta(minutes=10)
+    dictionary_fields = {
+        "appt_status": APPT_STATUS,
+        "appt_type": APPT_TYPE,
+        "appt_reason": APPT_REASON,
+    }
+    datetime_fields = ["timepoint_datetime", "appt_datetime", "created", "modified"]
+    partition_fields = ["visit_schedule_name", "schedule_name"]
+
+    def __init__(self, incremental=None, watermark_overlap=None, **kwargs):
+        try:
+            import pyarrow  # noqa
+        except ImportError as e:
+            raise AppointmentExporterError(
+                f"Parquet export requires `pyarrow`. Got {e}."
+            )
+        super().__init__(**kwargs)
+        self._schema = None
+        self.incremental = incremental
+        if watermark_overlap is not None:
+            self.watermark_overlap = watermark_overlap
+        self.dictionaries = {
+            k: [choice[0] for choice in v] for k, v in self.dictionary_fields.items()
+        }
+        self.indexes = {
+            k: {value: index for index, value in enumerate(v)}
+            for k, v in self.dictionaries.items()
+        }
+
+    @property
+    def schema(self):
+        import pyarrow as pa
+
+        if self._schema:
+            return self._schema
+        fields = []
+        for name in self.field_names:
+            if name in self.partition_fields:
+                continue
+            elif name in self.dictionary_fields:
+                fields.append(pa.field(name, pa.dictionary(pa.int16(), pa.string())))
+            elif name in self.datetime_fields:
+                fields.append(pa.field(name, pa.int64()))
+            elif name in ["visit_code_sequence", "site_id"]:
+                fields.append(pa.field(name, pa.int64()))
+            elif name == "timepoint":
+                fields.append(pa.field(name, pa.float64()))
+            elif name == "has_visit":
+                fields.append(pa.field(name, pa.bool_()))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        self._schema = pa.schema(fields)
+        return self._schema
+
+    @staticmethod
+    def to_int64(dt):
+        """Returns microseconds since the epoch (UTC) or None.
+        """
+        if dt is None:
+            return None
+        return (dt - EPOCH) // timedelta(microseconds=1)
+
+    def get_watermark(self, path=None):
+        try:
+            with open(os.path.join(path, self.watermark_filename)) as f:
+                return parse_datetime(json.load(f).get("last_modified"))
+        except FileNotFoundError:
+            return None
+
+    def set_watermark(self, path=None, last_modified=None):
+        with open(os.path.join(path, self.watermark_filename), "w") as f:
+            json.dump(dict(last_modified=last_modified.isoformat()), f)
+
+    def to_table(self, rows):
+        """Returns a pyarrow Table for a list of row dictionaries.
+        """
+        import pyarrow as pa
+
+        arrays = []
+        for field in self.schema:
+            values = [row[field.name] for row in rows]
+            if field.name in self.dictionary_fields:
+                indexes = self.indexes[field.name]
+                dictionary = self.dictionaries[field.name]
+                for value in values:
+                    if value is not None and value not in indexes:
+                        indexes[value] = len(dictionary)
+                        dictionary.append(value)
+                arrays.append(
+                    pa.DictionaryArray.from_arrays(
+                        pa.array(
+                            [None if v is None else indexes[v] for v in values],
+                            type=pa.int16(),
+                        ),
+                        pa.array(dictionary, type=pa.string()),
+                    )
+                )
+            elif field.name in self.datetime_fields:
+                arrays.append(
+                    pa.array([self.to_int64(v) for v in values], type=pa.int64())
+                )
+            elif field.name == "timepoint":
+                arrays.append(
+                    pa.array(
+                        [None if v is None else float(v) for v in values],
+                        type=pa.float64(),
+                    )
+                )
+            elif pa.types.is_string(field.type):
+                arrays.append(
+                    pa.array(
+                        [None if v is None else str(v) for v in values],
+                        type=pa.string(),
+                    )
+                )
+            else:
+                arrays.append(pa.array(values, type=field.type))
+        return pa.Table.from_arrays(arrays, schema=self.schema)
+
+    def to_parquet(self, path=None):
+        """Writes rows to partitioned Parquet files under `path` and
+        returns the number of rows written.
+        """
+        import pyarrow.parquet as pq
+
+        os.makedirs(path, exist_ok=True)
+        last_modified = None
+        if self.incremental:
+            last_modified = self.get_watermark(path=path)
+            if last_modified:
+                self.modified_after = last_modified - self.watermark_overlap
+        run = get_utcnow().strftime("%Y%m%dT%H%M%S%f")
+        writers = {}
+        batches = {}
+        count = 0
+        try:
+            for row in self.rows():
+                key = tuple([row[k] for k in self.partition_fields])
+                batches.setdefault(key, []).append(row)
+                if len(batches[key]) >= self.chunk_size:
+                    self.write_batch(pq, path, run, writers, key, batches.pop(key))
+                if not last_modified or row["modified"] > last_modified:
+                    last_modified = row["modified"]
+                count += 1
+            for key, rows in batches.items():
+                self.write_batch(pq, path, run, writers, key, rows)
+        finally:
+            for writer in writers.values():
+                writer.close()
+        if last_modified:
+            self.set_watermark(path=path, last_modified=last_modified)
+        return count
+
+    def write_batch(self, pq, path, run, writers, key, rows):
+        if key not in writers:
+            partition_path = os.path.join(
+                path,
+                *[f"{name}={value}" for name, value in zip(self.partition_fields, key)],
+            )
+            os.makedirs(partition_path, exist_ok=True)
+            writers[key] = pq.ParquetWriter(
+                os.path.join(partition_path, f"{run}.parquet"), self.schema
+            )
+        writers[key].write_table(self.to_table(rows))
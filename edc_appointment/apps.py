@@ -1,11 +1,7 @@
 import sys
 
-from datetime import datetime
-from dateutil.relativedelta import relativedelta
-from dateutil.tz.tz import gettz
 from django.apps import AppConfig as DjangoAppConfig
 from django.conf import settings
-from edc_utils import get_utcnow
 
 # from .appointment_config import AppointmentConfig
 
@@ -28,12 +24,23 @@ class AppConfig(DjangoAppConfig):
             create_appointments_on_post_save,  # noqa
             appointment_post_save,  # noqa
             appointments_on_pre_delete,  # noqa
+            holiday_on_post_save_or_delete,  # noqa
+            appointment_registry_on_class_prepared,  # noqa
+            appointment_registry_on_setting_changed,  # noqa
+            appointment_tags_on_setting_changed,  # noqa
+            metrics_on_setting_changed,  # noqa
+            visit_report_on_post_save,  # noqa
+            visit_report_on_post_delete,  # noqa
+            appointment_summary_on_post_save,  # noqa
+            appointment_summary_on_post_delete,  # noqa
+            appointment_list_cache_on_post_save_or_delete,  # noqa
         )
 
-        sys.stdout.write(f"Loading {self.verbose_name} ...\n")
-        #         for config in self.configurations:
-        #             sys.stdout.write(f" * {config.name}.\n")
-        sys.stdout.write(f" Done loading {self.verbose_name}.\n")
+        if getattr(settings, "EDC_APPOINTMENT_READY_BANNER", True):
+            sys.stdout.write(f"Loading {self.verbose_name} ...\n")
+            #         for config in self.configurations:
+            #             sys.stdout.write(f" * {config.name}.\n")
+            sys.stdout.write(f" Done loading {self.verbose_name}.\n")
 
 
 #     def get_configuration(self, name=None, related_visit_model=None):
@@ -60,9 +67,14 @@ class AppConfig(DjangoAppConfig):
 
 if settings.APP_NAME == "edc_appointment":
 
+    # test settings only
+    from datetime import datetime
+    from dateutil.relativedelta import relativedelta
     from dateutil.relativedelta import SU, MO, TU, WE, TH, FR, SA
+    from dateutil.tz.tz import gettz
     from edc_facility.apps import AppConfig as BaseEdcFacilityAppConfig
     from edc_protocol.apps import AppConfig as BaseEdcProtocolAppConfig
+    from edc_utils import get_utcnow
 
     class EdcFacilityAppConfig(BaseEdcFacilityAppConfig):
         definitions = {
@@ -1,5 +1,6 @@
+from ..appointment_config import AppointmentConfigError
 from .appointment_creator import AppointmentCreator, CreateAppointmentError
-from .appointment_creator import AppointmentConfigError, AppointmentCreatorError
+from .appointment_creator import AppointmentCreatorError
 from .appointments_creator import AppointmentsCreator
 from .unscheduled_appointment_creator import UnscheduledAppointmentCreator
 from .unscheduled_appointment_creator import AppointmentInProgressError
@@ -1,13 +1,16 @@
-from django.apps import apps as django_apps
 from django.conf import settings
+from django.contrib.sites.models import Site
 from django.core.exceptions import ObjectDoesNotExist
 from django.db import transaction
 from django.db.utils import IntegrityError
 from django.utils.timezone import is_naive
 from edc_facility.facility import FacilityError
+from simple_history.utils import bulk_create_with_history, bulk_update_with_history
 
-from ..appointment_config import AppointmentConfigError
+from ..appointment_config import appointment_registry
 from ..constants import CLINIC
+from ..facility_calendar import facility_calendars
+from ..metrics import instrumented
 
 
 class CreateAppointmentError(Exception):
@@ -23,6 +26,19 @@ class AppointmentCreatorError(Exception):
 
 
 class AppointmentCreator:
+
+    """Creates or updates an appointment for a subject's visit.
+
+    By default the appointment is created or updated on
+    instantiation. If `defer` is True, instantiation only validates
+    the inputs and computes the planned row; call `commit()`, or
+    `AppointmentCreator.flush()` for a list of creators, to write.
+    """
+
+    # if True, look up available dates in a precomputed
+    # `FacilityCalendar` instead of walking the window day by day.
+    use_facility_calendar = True
+
     def __init__(
         self,
         timepoint_datetime=None,
@@ -38,8 +54,10 @@ class AppointmentCreator:
         default_appt_type=None,
         appt_status=None,
         suggested_datetime=None,
+        defer=None,
     ):
         self._appointment = None
+        self._appt_rdate = None
         self._appointment_config = None
         self._appointment_model_cls = None
         self._default_appt_type = default_appt_type
@@ -48,6 +66,7 @@ class AppointmentCreator:
         self.schedule_name = schedule_name
         self.appt_status = appt_status
         self.appointment_model = appointment_model
+        self.defer = defer
         # already taken appt_datetimes for this subject
         self.taken_datetimes = taken_datetimes or []
         self.visit = visit
@@ -80,7 +99,10 @@ class AppointmentCreator:
             raise AppointmentCreatorError(
                 f"facility_name not defined. See {repr(visit)}"
             )
-        self.appointment
+        if self.defer:
+            self.planned
+        else:
+            self.appointment
 
     def __repr__(self):
         return (
@@ -106,6 +128,99 @@ class AppointmentCreator:
                 self._appointment = self._update(appointment=self._appointment)
         return self._appointment
 
+    def commit(self):
+        """Returns the created or updated appointment model instance
+        for a deferred creator.
+        """
+        return self.appointment
+
+    @classmethod
+    @instrumented("appointment_creator.flush")
+    def flush(cls, creators=None):
+        """Returns a list of created or updated appointment model
+        instances for a list of deferred creators.
+
+        Existing appointments are fetched in one query. New
+        appointments are bulk created and existing appointments
+        bulk updated, with their historical records, in one
+        transaction. Like `bulk_create`, save() is not called and no
+        signals are sent. The appointment summaries and the list
+        cache are refreshed once per flush instead.
+        """
+        creators = creators or []
+        pending = [c for c in creators if not c._appointment]
+        if pending:
+            model_cls = pending[0].appointment_model_cls
+            existing = {}
+            for appointment in model_cls.objects.filter(
+                subject_identifier__in=set([c.subject_identifier for c in pending]),
+                visit_schedule_name__in=set([c.visit_schedule_name for c in pending]),
+                schedule_name__in=set([c.schedule_name for c in pending]),
+            ):
+                existing.update({appointment.natural_key(): appointment})
+            # set by SiteModelMixin.save() on create
+            options = {}
+            if hasattr(model_cls, "site"):
+                options.update(site=Site.objects.get_current())
+            created = []
+            updated = []
+            for creator in pending:
+                appointment = existing.get(creator.natural_key)
+                if appointment and all(
+                    [getattr(appointment, k) == v for k, v in creator.options.items()]
+                ):
+                    appointment.appt_datetime = creator.appt_rdate.datetime
+                    appointment.timepoint_datetime = creator.timepoint_datetime
+                    updated.append(appointment)
+                else:
+                    appointment = model_cls(**creator.planned, **options)
+                    created.append(appointment)
+                creator._appointment = appointment
+            try:
+                with transaction.atomic():
+                    bulk_create_with_history(created, model_cls)
+                    bulk_update_with_history(
+                        updated, model_cls, ["appt_datetime", "timepoint_datetime"]
+                    )
+            except IntegrityError as e:
+                for creator in pending:
+                    creator._appointment = None
+                raise CreateAppointmentError(
+                    f"An 'IntegrityError' was raised while trying to "
+                    f"create appointments. Got {e}."
+                )
+            model_cls.objects.refresh_appointment_summaries(created + updated)
+            model_cls.objects.bump_appointment_list_cache(created + updated)
+        return [creator.appointment for creator in creators]
+
+    @property
+    def natural_key(self):
+        """Returns the natural key of the planned appointment.
+        """
+        return (
+            self.subject_identifier,
+            self.visit_schedule_name,
+            self.schedule_name,
+            self.visit.code,
+            self.visit_code_sequence,
+        )
+
+    @property
+    def planned(self):
+        """Returns a dictionary of field values for the appointment
+        to be created or updated.
+
+        Computes the appointment datetime without touching the
+        appointment table.
+        """
+        return dict(
+            facility_name=self.facility.name,
+            timepoint_datetime=self.timepoint_datetime,
+            appt_datetime=self.appt_rdate.datetime,
+            appt_type=self.default_appt_type,
+            **self.options,
+        )
+
     @property
     def available_rdate(self, dt=None):
         available_datetime = self.facility.available_rdate(dt)
@@ -128,17 +243,14 @@ class AppointmentCreator:
             options.update(appt_status=self.appt_status)
         return options
 
+    @instrumented("appointment_creator.create")
     def _create(self):
         """Returns a newly created appointment model instance.
         """
         try:
             with transaction.atomic():
                 appointment = self.appointment_model_cls.objects.create(
-                    facility_name=self.facility.name,
-                    timepoint_datetime=self.timepoint_datetime,
-                    appt_datetime=self.appt_rdate.datetime,
-                    appt_type=self.default_appt_type,
-                    **self.options,
+                    **self.planned
                 )
         except IntegrityError as e:
             raise CreateAppointmentError(
@@ -148,6 +260,7 @@ class AppointmentCreator:
             )
         return appointment
 
+    @instrumented("appointment_creator.update")
     def _update(self, appointment=None):
         """Returns an updated appointment model instance.
         """
@@ -163,47 +276,46 @@ class AppointmentCreator:
 
         Raises an CreateAppointmentDateError if none.
         """
+        if self._appt_rdate:
+            return self._appt_rdate
+        options = dict(
+            suggested_datetime=self.suggested_datetime,
+            forward_delta=self.visit.rupper,
+            reverse_delta=self.visit.rlower,
+            taken_datetimes=self.taken_datetimes,
+        )
         try:
-            appt_rdate = self.facility.available_rdate(
-                suggested_datetime=self.suggested_datetime,
-                forward_delta=self.visit.rupper,
-                reverse_delta=self.visit.rlower,
-                taken_datetimes=self.taken_datetimes,
-            )
+            if self.use_facility_calendar:
+                appt_rdate = facility_calendars.get(
+                    facility=self.facility
+                ).available_rdate(facility=self.facility, **options)
+            else:
+                appt_rdate = self.facility.available_rdate(**options)
         except FacilityError as e:
             raise CreateAppointmentDateError(
                 f"{e} Visit={repr(self.visit)}. "
                 f"Try setting 'best_effort_available_datetime=True' on facility."
             )
+        self._appt_rdate = appt_rdate
         return appt_rdate
 
     @property
     def appointment_config(self):
         if not self._appointment_config:
-            app_config = django_apps.get_app_config("edc_appointment")
-            try:
-                self._appointment_config = [
-                    a
-                    for a in app_config.configurations
-                    if a.name == self.appointment_model
-                ][0]
-            except IndexError as e:
-                if len(app_config.configurations) == 1 and not self.appointment_model:
-                    self._appointment_config = app_config.configurations[0]
-                else:
-                    config_names = [a.name for a in app_config.configurations]
-                    raise AppointmentConfigError(
-                        f"Error looking up appointment config for {self.appointment_model}. "
-                        f"Got {e}. AppoinmentConfigs exist for {config_names}. "
-                        f"See {app_config.configurations}. See also the visit schedule."
-                    )
+            self._appointment_config = appointment_registry.get_config(
+                name=self.appointment_model
+            )
         return self._appointment_config
 
     @property
     def appointment_model_cls(self):
         """Returns the appointment model class.
         """
-        return django_apps.get_model("edc_appointment.appointment")
+        if not self._appointment_model_cls:
+            self._appointment_model_cls = appointment_registry.get_model_cls(
+                name="edc_appointment.appointment"
+            )
+        return self._appointment_model_cls
 
     @property
     def default_appt_type(self):
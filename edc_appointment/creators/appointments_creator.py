@@ -1,9 +1,11 @@
 import arrow
 
 from django.apps import apps as django_apps
+from django.db import transaction
 from django.db.models.deletion import ProtectedError
 from edc_facility import FacilityError
 
+from ..metrics import instrumented
 from .appointment_creator import AppointmentCreator, CreateAppointmentError
 
 
@@ -32,6 +34,7 @@ class AppointmentsCreator:
         self.report_datetime = report_datetime
         self.appointment_model = appointment_model
 
+    @instrumented("appointments_creator.create_appointments")
     def create_appointments(self, base_appt_datetime=None, taken_datetimes=None):
         """Creates appointments when called by post_save signal.
 
@@ -79,14 +82,40 @@ class AppointmentsCreator:
         return appointment_creator.appointment
 
     def delete_unused_appointments(self):
+        """Deletes appointments for this subject and schedule
+        without a visit report and returns a tuple of the number
+        deleted and a list of the primary keys of those kept.
+
+        Deletes in one transaction using the queryset so that
+        signals, and historical records, still apply per row.
+        """
         appointments = self.appointment_model.objects.filter(
             subject_identifier=self.subject_identifier,
             visit_schedule_name=self.visit_schedule.name,
             schedule_name=self.schedule.name,
         )
-        for appointment in appointments:
-            try:
-                appointment.delete()
-            except ProtectedError:
-                pass
-        return None
+        related = getattr(
+            self.appointment_model, self.appointment_model.related_visit_model_attr()
+        ).related
+        unused = appointments.exclude(
+            pk__in=related.related_model.objects.filter(
+                **{f"{related.field.name}__subject_identifier": self.subject_identifier}
+            ).values(related.field.attname)
+        )
+        label = self.appointment_model._meta.label
+        try:
+            with transaction.atomic():
+                _, deleted = unused.delete()
+            deleted = deleted.get(label, 0)
+        except ProtectedError:
+            # protected by a model other than the visit model
+            deleted = 0
+            for appointment in unused:
+                try:
+                    with transaction.atomic():
+                        appointment.delete()
+                except ProtectedError:
+                    pass
+                else:
+                    deleted += 1
+        return deleted, list(appointments.values_list("pk", flat=True))
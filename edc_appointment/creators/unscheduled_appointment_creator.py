@@ -1,10 +1,11 @@
 from decimal import Decimal
-from django.core.exceptions import ObjectDoesNotExist, MultipleObjectsReturned
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
 from ..constants import COMPLETE_APPT, INCOMPLETE_APPT, NEW_APPT
 from ..constants import CANCELLED_APPT, IN_PROGRESS_APPT
-from .appointment_creator import AppointmentCreator
+from ..metrics import instrumented
+from ..routers import pin_to_primary
+from .appointment_creator import AppointmentCreator, CreateAppointmentError
 
 
 class UnscheduledAppointmentError(Exception):
@@ -31,6 +32,8 @@ class UnscheduledAppointmentCreator:
 
     appointment_creator_cls = AppointmentCreator
 
+    @instrumented("unscheduled_appointment_creator")
+    @pin_to_primary()
     def __init__(
         self,
         subject_identifier=None,
@@ -63,32 +66,17 @@ class UnscheduledAppointmentCreator:
         if visit.allow_unscheduled:
             # force lookup and parent_appointment exceptions
             self.parent_appointment
-            # do not allow if any appointments are IN_PROGRESS
-            try:
-                obj = self.appointment_model_cls.objects.get(
-                    subject_identifier=self.subject_identifier,
-                    visit_schedule_name=self.visit_schedule_name,
-                    schedule_name=self.schedule_name,
-                    appt_status=IN_PROGRESS_APPT,
-                )
-            except MultipleObjectsReturned as e:
-                raise UnscheduledAppointmentError(e)
-            except ObjectDoesNotExist:
-                pass
-            else:
-                raise AppointmentInProgressError(
-                    f"Not allowed. Appointment {obj.visit_code}."
-                    f"{obj.visit_code_sequence} is in progress."
-                )
-
             # don't allow if next appointment is already started.
-            next_by_timepoint = self.parent_appointment.next_by_timepoint
+            next_by_timepoint = self.parent_appointment.next_by_timepoint_values
             if next_by_timepoint:
                 if next_by_timepoint.appt_status not in [NEW_APPT, CANCELLED_APPT]:
                     raise UnscheduledAppointmentError(
                         f"Not allowed. Visit {next_by_timepoint.visit_code} has "
                         "already been started."
                     )
+            if not self.appointment_model_cls.in_progress_constraint_enforced():
+                # the database does not enforce `unique_in_progress_appt`
+                self.raise_if_appointment_in_progress()
             appointment_creator = self.appointment_creator_cls(
                 subject_identifier=self.subject_identifier,
                 visit_schedule_name=self.visit_schedule_name,
@@ -101,13 +89,39 @@ class UnscheduledAppointmentCreator:
                 facility=self.facility,
                 appt_status=IN_PROGRESS_APPT,
             )
-            self.appointment = appointment_creator.appointment
+            try:
+                self.appointment = appointment_creator.appointment
+            except CreateAppointmentError:
+                # do not allow if any appointments are IN_PROGRESS.
+                # See constraint `unique_in_progress_appt`.
+                self.raise_if_appointment_in_progress()
+                raise
         else:
             raise UnscheduledAppointmentNotAllowed(
                 f"Not allowed. Visit {visit_code} is not configured for "
                 "unscheduled appointments."
             )
 
+    @property
+    def appointment_in_progress(self):
+        """Returns the appointment in progress in this schedule,
+        if any.
+        """
+        return self.appointment_model_cls.objects.filter(
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name=self.visit_schedule_name,
+            schedule_name=self.schedule_name,
+            appt_status=IN_PROGRESS_APPT,
+        ).first()
+
+    def raise_if_appointment_in_progress(self):
+        obj = self.appointment_in_progress
+        if obj:
+            raise AppointmentInProgressError(
+                f"Not allowed. Appointment {obj.visit_code}."
+                f"{obj.visit_code_sequence} is in progress."
+            )
+
     @property
     def parent_appointment(self):
         if not self._parent_appointment:
@@ -119,9 +133,7 @@ class UnscheduledAppointmentCreator:
                 visit_code_sequence=0,
             )
             self._parent_appointment = self.appointment_model_cls.objects.get(**options)
-            try:
-                self._parent_appointment.visit
-            except ObjectDoesNotExist:
+            if not self._parent_appointment.has_visit_report:
                 raise InvalidParentAppointmentMissingVisitError(
                     f"Unable to create unscheduled appointment. An unscheduled "
                     f"appointment cannot be created if the parent appointment "
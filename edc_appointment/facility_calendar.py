@@ -0,0 +1,202 @@
+import arrow
+
+from bisect import bisect_left
+from datetime import date, datetime
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.conf import settings
+from edc_facility import FacilityError
+from edc_utils import get_utcnow, convert_php_dateformat
+from functools import lru_cache
+
+
+class FacilityCalendar:
+
+    """A precomputed calendar of open days for a facility.
+
+    Open days are held as a sorted list of date ordinals covering
+    the protocol period and holidays as a set of local dates, so
+    finding an available date within a visit window is a binary
+    search instead of a day-by-day walk with a holiday query
+    per day.
+
+    `available_rdate` returns the same value as
+    `Facility.available_rdate`.
+    """
+
+    lru_maxsize = 1024
+
+    def __init__(self, facility=None, start_date=None, end_date=None):
+        self._holidays = None
+        self.facility_holidays = facility.holidays
+        self.name = facility.name
+        self.weekdays = frozenset(facility.weekdays)
+        self.time_zone = facility.holidays.time_zone
+        self.start_ordinal = None
+        self.end_ordinal = None
+        self.open_days = []
+        self.open_ordinals = lru_cache(maxsize=self.lru_maxsize)(self._open_ordinals)
+        if not start_date or not end_date:
+            start_date, end_date = self.protocol_period
+        self.extend(start_date.toordinal(), end_date.toordinal())
+
+    def __repr__(self):
+        return (
+            f"{self.__class__.__name__}(name={self.name}, "
+            f"open_days={len(self.open_days)})"
+        )
+
+    @property
+    def protocol_period(self):
+        """Returns a tuple of the study open and close dates or
+        the next year from today if not available.
+        """
+        try:
+            app_config = django_apps.get_app_config("edc_protocol")
+            start_date = app_config.study_open_datetime.date()
+            end_date = app_config.study_close_datetime.date()
+        except (LookupError, AttributeError):
+            start_date = get_utcnow().date()
+            end_date = start_date + relativedelta(years=1)
+        return start_date, end_date
+
+    @property
+    def holidays(self):
+        """Returns a frozenset of holiday local dates.
+        """
+        if self._holidays is None:
+            self._holidays = frozenset(self.facility_holidays.local_dates)
+        return self._holidays
+
+    def extend(self, start_ordinal=None, end_ordinal=None):
+        """Extends the calendar, if necessary, to include the
+        range of date ordinals.
+        """
+        if self.start_ordinal is not None:
+            if start_ordinal >= self.start_ordinal and end_ordinal <= self.end_ordinal:
+                return None
+            start_ordinal = min(start_ordinal, self.start_ordinal)
+            end_ordinal = max(end_ordinal, self.end_ordinal)
+        self.open_days = [
+            ordinal
+            for ordinal in range(start_ordinal, end_ordinal + 1)
+            if date.fromordinal(ordinal).weekday() in self.weekdays
+        ]
+        self.start_ordinal, self.end_ordinal = start_ordinal, end_ordinal
+        self.open_ordinals.cache_clear()
+        return None
+
+    def is_holiday(self, rdate=None):
+        """Returns True if the local date of the UTC arrow object
+        is a holiday.
+        """
+        return rdate.to(self.time_zone).date() in self.holidays
+
+    @staticmethod
+    def to_rdate(ordinal, time):
+        """Returns an arrow object for the date ordinal at time.
+        """
+        return arrow.Arrow.fromdatetime(
+            datetime.combine(date.fromordinal(ordinal), time)
+        )
+
+    def _open_ordinals(self, min_ordinal, max_ordinal, time, include_holidays):
+        """Returns a tuple of date ordinals for open days equal to
+        or greater than `min_ordinal` and less than `max_ordinal`.
+
+        Wrapped with `lru_cache` in __init__.
+        """
+        lower = bisect_left(self.open_days, min_ordinal)
+        upper = bisect_left(self.open_days, max_ordinal)
+        ordinals = self.open_days[lower:upper]
+        if not include_holidays:
+            ordinals = [
+                ordinal
+                for ordinal in ordinals
+                if not self.is_holiday(self.to_rdate(ordinal, time))
+            ]
+        return tuple(ordinals)
+
+    def available_rdate(
+        self,
+        facility=None,
+        suggested_datetime=None,
+        forward_delta=None,
+        reverse_delta=None,
+        taken_datetimes=None,
+        include_holidays=None,
+    ):
+        """Returns an arrow object for a datetime equal to or
+        close to the suggested datetime.
+
+        See `Facility.available_rdate`. `facility` provides the
+        `open_slot_on` hook and `best_effort_available_datetime`.
+        """
+        forward_delta = forward_delta or relativedelta(months=1)
+        reverse_delta = reverse_delta or relativedelta(months=0)
+        if suggested_datetime:
+            suggested_rdate = arrow.Arrow.fromdatetime(suggested_datetime)
+        else:
+            suggested_rdate = arrow.Arrow.fromdatetime(get_utcnow())
+        minimum = facility.to_arrow_utc(suggested_rdate.datetime - reverse_delta)
+        maximum = facility.to_arrow_utc(suggested_rdate.datetime + forward_delta)
+        min_ordinal = minimum.date().toordinal()
+        max_ordinal = maximum.date().toordinal()
+        self.extend(min_ordinal, max_ordinal)
+        taken_ordinals = {
+            facility.to_arrow_utc(dt).date().toordinal()
+            for dt in taken_datetimes or []
+        }
+        time = suggested_rdate.time()
+        for ordinal in self.open_ordinals(
+            min_ordinal, max_ordinal, time, bool(include_holidays)
+        ):
+            if ordinal not in taken_ordinals:
+                rdate = self.to_rdate(ordinal, time)
+                if facility.open_slot_on(rdate):
+                    return rdate
+        if facility.best_effort_available_datetime:
+            return self.to_rdate(max_ordinal, time)
+        formatted_date = suggested_datetime.strftime(
+            convert_php_dateformat(settings.SHORT_DATE_FORMAT)
+        )
+        raise FacilityError(
+            f"No available appointment dates at facility for period. "
+            f"Got no available dates within {reverse_delta.days}-"
+            f"{forward_delta.days} days of {formatted_date}. "
+            f"Facility is {repr(facility)}."
+        )
+
+
+class FacilityCalendars:
+
+    """A registry of `FacilityCalendar` instances by facility
+    name, weekdays and site.
+
+    Cleared when a holiday is saved or deleted. Call `clear()`
+    after a bulk holiday import.
+    """
+
+    calendar_cls = FacilityCalendar
+
+    def __init__(self):
+        self._registry = {}
+
+    def get(self, facility=None):
+        key = (
+            facility.name,
+            tuple(sorted(facility.weekdays)),
+            getattr(settings, "SITE_ID", None),
+        )
+        try:
+            calendar = self._registry[key]
+        except KeyError:
+            calendar = self.calendar_cls(facility=facility)
+            self._registry[key] = calendar
+        return calendar
+
+    def clear(self):
+        self._registry = {}
+
+
+facility_calendars = FacilityCalendars()
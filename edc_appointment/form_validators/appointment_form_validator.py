@@ -1,13 +1,13 @@
 from arrow.arrow import Arrow
 from django import forms
 from django.apps import apps as django_apps
-from django.core.exceptions import ObjectDoesNotExist
 from edc_form_validators.form_validator import FormValidator
 from edc_metadata.form_validators import MetaDataFormValidatorMixin
 from edc_utils import get_utcnow
 
 from ..constants import NEW_APPT, IN_PROGRESS_APPT, CANCELLED_APPT
 from ..constants import UNSCHEDULED_APPT, INCOMPLETE_APPT, COMPLETE_APPT
+from ..metrics import instrumented
 
 
 class AppointmentFormValidator(MetaDataFormValidatorMixin, FormValidator):
@@ -17,6 +17,7 @@ class AppointmentFormValidator(MetaDataFormValidatorMixin, FormValidator):
 
     appointment_model = "edc_appointment.appointment"
 
+    @instrumented("appointment_form_validator.clean")
     def clean(self):
 
         self.validate_visit_report_sequence()
@@ -43,27 +44,21 @@ class AppointmentFormValidator(MetaDataFormValidatorMixin, FormValidator):
     def validate_visit_report_sequence(self):
         """Enforce visit report sequence.
         """
-        try:
-            self.instance.visit
-        except (ObjectDoesNotExist, AttributeError):
-            if (
-                self.cleaned_data.get("appt_status") == IN_PROGRESS_APPT
-                and self.instance
-            ):
-                try:
-                    self.instance.visit
-                except ObjectDoesNotExist:
-                    previous_appt = self.instance.get_previous(include_interim=True)
-                    if previous_appt:
-                        try:
-                            previous_appt.visit
-                        except ObjectDoesNotExist:
-                            raise forms.ValidationError(
-                                "A previous appointment requires a visit report. "
-                                f"Update appointment {previous_appt.visit_code}."
-                                f"{previous_appt.visit_code_sequence} first.",
-                                code="previous_visit_missing",
-                            )
+        if (
+            self.cleaned_data.get("appt_status") == IN_PROGRESS_APPT
+            and self.instance
+            and not self.instance.has_visit_report
+        ):
+            previous_appt = self.instance.get_previous(
+                include_interim=True, values=True
+            )
+            if previous_appt and not previous_appt.has_visit_report:
+                raise forms.ValidationError(
+                    "A previous appointment requires a visit report. "
+                    f"Update appointment {previous_appt.visit_code}."
+                    f"{previous_appt.visit_code_sequence} first.",
+                    code="previous_visit_missing",
+                )
         return True
 
     def validate_appt_sequence(self):
@@ -81,25 +76,28 @@ class AppointmentFormValidator(MetaDataFormValidatorMixin, FormValidator):
             COMPLETE_APPT,
         ]:
             try:
-                self.instance.previous.visit
-            except ObjectDoesNotExist:
-                first_new_appt = (
-                    self.appointment_model_cls.objects.filter(
-                        subject_identifier=self.instance.subject_identifier,
-                        visit_schedule_name=self.instance.visit_schedule_name,
-                        schedule_name=self.instance.schedule_name,
-                        appt_status=NEW_APPT,
-                    )
-                    .order_by("timepoint", "visit_code_sequence")
-                    .first()
-                )
-                if first_new_appt:
-                    raise forms.ValidationError(
-                        "A previous appointment requires updating. "
-                        f"Update appointment for {first_new_appt.visit_code} first."
-                    )
+                previous_appt = self.instance.get_previous(values=True)
+                has_visit_report = previous_appt.has_visit_report
             except AttributeError:
                 pass
+            else:
+                if not has_visit_report:
+                    first_new_appt = (
+                        self.appointment_model_cls.objects.filter(
+                            subject_identifier=self.instance.subject_identifier,
+                            visit_schedule_name=self.instance.visit_schedule_name,
+                            schedule_name=self.instance.schedule_name,
+                            appt_status=NEW_APPT,
+                        )
+                        .order_by("timepoint", "visit_code_sequence")
+                        .first()
+                    )
+                    if first_new_appt:
+                        raise forms.ValidationError(
+                            "A previous appointment requires updating. "
+                            "Update appointment for "
+                            f"{first_new_appt.visit_code} first."
+                        )
         return True
 
     def validate_not_future_appt_datetime(self):
@@ -163,8 +161,22 @@ class AppointmentFormValidator(MetaDataFormValidatorMixin, FormValidator):
             )
 
     def validate_appt_inprogress(self):
+        """Raises if changing to IN_PROGRESS_APPT and another
+        appointment in this schedule is in progress.
+
+        Not checked if the instance is already in progress and the
+        database enforces `unique_in_progress_appt`, since it is then
+        the only one.
+        """
         appt_status = self.cleaned_data.get("appt_status")
-        if appt_status == IN_PROGRESS_APPT and self.appointment_in_progress_exists:
+        if (
+            appt_status == IN_PROGRESS_APPT
+            and (
+                getattr(self.instance, "appt_status", None) != IN_PROGRESS_APPT
+                or not self.appointment_model_cls.in_progress_constraint_enforced()
+            )
+            and self.appointment_in_progress_exists
+        ):
             raise forms.ValidationError(
                 {
                     "appt_status": (
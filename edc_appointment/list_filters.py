@@ -0,0 +1,26 @@
+from django.contrib.admin import SimpleListFilter
+from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+
+
+class VisitCodeListFilter(SimpleListFilter):
+
+    """A list filter for `visit_code` with choices from the
+    registered visit schedules instead of a SELECT DISTINCT on the
+    appointment table.
+    """
+
+    title = "visit code"
+    parameter_name = "visit_code"
+
+    def lookups(self, request, model_admin):
+        visit_codes = {}
+        for visit_schedule in site_visit_schedules.registry.values():
+            for schedule in visit_schedule.schedules.values():
+                for visit in schedule.visits.values():
+                    visit_codes.setdefault(visit.code, visit.code)
+        return sorted(visit_codes.items())
+
+    def queryset(self, request, queryset):
+        if self.value():
+            return queryset.filter(visit_code=self.value())
+        return queryset
@@ -0,0 +1,83 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...appointment_history_compactor import (
+    AppointmentHistoryCompactor,
+    AppointmentHistoryCompactorError,
+)
+from ...routers import pinning_scope
+from ..utils import get_datetime
+
+
+class Command(BaseCommand):
+
+    help = (
+        "Delete historical appointment records that change nothing and "
+        "archive the history of subjects off schedule to newline-delimited JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--skip-compact",
+            dest="skip_compact",
+            action="store_true",
+            default=False,
+            help="Do not delete historical records with no change",
+        )
+        parser.add_argument(
+            "--archive-before",
+            dest="archive_before",
+            help="Archive the history of subjects off schedule before this date",
+        )
+        parser.add_argument(
+            "--path", dest="path", default=None, help="Archive file (appended to)"
+        )
+        parser.add_argument(
+            "--model", dest="model", default="edc_appointment.appointment"
+        )
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int)
+        parser.add_argument(
+            "--dry-run",
+            dest="dry_run",
+            action="store_true",
+            default=False,
+            help="Count only. Nothing is deleted",
+        )
+
+    @pinning_scope()
+    def handle(self, *args, **options):
+        path = options.get("path")
+        archive_before = get_datetime(options.get("archive_before"))
+        if archive_before and not path and not options.get("dry_run"):
+            raise CommandError("Expected --path for --archive-before.")
+        compactor = AppointmentHistoryCompactor(
+            appointment_model=options.get("model"),
+            chunk_size=options.get("chunk_size"),
+            dry_run=options.get("dry_run"),
+            progress=self.progress,
+        )
+        if options.get("dry_run"):
+            path = os.devnull
+        try:
+            if not options.get("skip_compact"):
+                deleted = compactor.compact()
+                self.stdout.write(
+                    f"Deleted {deleted} historical records with no change."
+                )
+            if archive_before:
+                with open(path, "a") as f:
+                    archived = compactor.archive(f, before=archive_before)
+                self.stdout.write(
+                    f"Archived {archived} historical records of subjects "
+                    f"off schedule to {path}."
+                )
+        except AppointmentHistoryCompactorError as e:
+            raise CommandError(e)
+        if options.get("dry_run"):
+            self.stdout.write(self.style.WARNING("Dry run. Nothing was deleted."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Done."))
+
+    def progress(self, count):
+        self.stderr.write(f" * read {count} historical records ...")
@@ -0,0 +1,92 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from ...appointment_exporter import AppointmentExporter, AppointmentExporterError
+from ...appointment_snapshot_exporter import AppointmentSnapshotExporter
+from ...routers import pinning_scope
+from ..utils import get_datetime
+
+
+class Command(BaseCommand):
+
+    help = "Export appointments to CSV, newline-delimited JSON or Parquet"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--format",
+            dest="format",
+            default="csv",
+            choices=["csv", "jsonl", "parquet"],
+        )
+        parser.add_argument(
+            "--path",
+            dest="path",
+            default=None,
+            help="Output file, or directory for parquet. Default: stdout",
+        )
+        parser.add_argument(
+            "--incremental",
+            dest="incremental",
+            action="store_true",
+            default=False,
+            help="parquet only. Export rows modified since the last export to path",
+        )
+        parser.add_argument("--visit-schedule", dest="visit_schedule_name")
+        parser.add_argument("--schedule", dest="schedule_name")
+        parser.add_argument(
+            "--site", dest="site_ids", type=int, action="append", help="Site id"
+        )
+        parser.add_argument(
+            "--start", dest="start_datetime", help="appt_datetime on or after"
+        )
+        parser.add_argument("--end", dest="end_datetime", help="appt_datetime before")
+        parser.add_argument(
+            "--include-visit",
+            dest="include_visit",
+            action="store_true",
+            default=False,
+            help="Add column `has_visit` for visit report presence",
+        )
+        parser.add_argument("--chunk-size", dest="chunk_size", type=int)
+
+    @pinning_scope()
+    def handle(self, *args, **options):
+        path = options.get("path")
+        exporter_options = {}
+        if options.get("format") == "parquet":
+            if not path:
+                raise CommandError("Expected --path for format parquet.")
+            exporter_cls = AppointmentSnapshotExporter
+            exporter_options.update(incremental=options.get("incremental"))
+        else:
+            exporter_cls = AppointmentExporter
+        try:
+            exporter = exporter_cls(
+                visit_schedule_name=options.get("visit_schedule_name"),
+                schedule_name=options.get("schedule_name"),
+                site_ids=options.get("site_ids"),
+                start_datetime=get_datetime(options.get("start_datetime")),
+                end_datetime=get_datetime(options.get("end_datetime")),
+                include_visit=options.get("include_visit"),
+                chunk_size=options.get("chunk_size"),
+                progress=self.progress,
+                **exporter_options,
+            )
+        except AppointmentExporterError as e:
+            raise CommandError(e)
+        if options.get("format") == "parquet":
+            count = exporter.to_parquet(path=path)
+            self.stderr.write(f"Done. Exported {count} appointments.")
+            return None
+        f = open(path, "w", newline="") if path else self.stdout
+        try:
+            if options.get("format") == "jsonl":
+                count = exporter.to_jsonl(f)
+            else:
+                count = exporter.to_csv(f)
+        finally:
+            if path:
+                f.close()
+        self.stderr.write(f"Done. Exported {count} appointments.")
+
+    def progress(self, count):
+        self.stderr.write(f" * exported {count} appointments ...")
@@ -0,0 +1,28 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand
+
+from ...models import AppointmentSummary
+from ...routers import pinning_scope
+
+
+class Command(BaseCommand):
+
+    help = "Rebuild appointment summaries from the appointment table"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--subject", dest="subject_identifier")
+        parser.add_argument(
+            "--model", dest="model", default="edc_appointment.appointment"
+        )
+
+    @pinning_scope()
+    def handle(self, *args, **options):
+        opts = {}
+        if options.get("subject_identifier"):
+            opts.update(subject_identifier=options.get("subject_identifier"))
+        count = AppointmentSummary.objects.rebuild(
+            appointment_model_cls=django_apps.get_model(options.get("model")), **opts
+        )
+        self.stdout.write(
+            self.style.SUCCESS(f"Done. Rebuilt {count} appointment summaries.")
+        )
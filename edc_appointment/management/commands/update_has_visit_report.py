@@ -0,0 +1,51 @@
+from django.apps import apps as django_apps
+from django.core.management.base import BaseCommand
+
+from ...routers import pinning_scope
+
+
+class Command(BaseCommand):
+
+    help = "Backfill or verify `has_visit_report` on appointments"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verify",
+            dest="verify",
+            action="store_true",
+            default=False,
+            help="Report appointments out of sync without updating",
+        )
+        parser.add_argument("--subject", dest="subject_identifier")
+        parser.add_argument(
+            "--model", dest="model", default="edc_appointment.appointment"
+        )
+
+    @pinning_scope()
+    def handle(self, *args, **options):
+        model_cls = django_apps.get_model(options.get("model"))
+        opts = {}
+        if options.get("subject_identifier"):
+            opts.update(subject_identifier=options.get("subject_identifier"))
+        missing, stale = model_cls.objects.update_has_visit_report(
+            commit=not options.get("verify"), **opts
+        )
+        if options.get("verify"):
+            self.stdout.write(
+                f"{missing} appointments have a visit report but "
+                f"has_visit_report=False. {stale} appointments have no visit "
+                f"report but has_visit_report=True."
+            )
+            if missing or stale:
+                self.stdout.write(
+                    self.style.WARNING(
+                        "Run without --verify to update has_visit_report."
+                    )
+                )
+        else:
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Done. Set has_visit_report=True on {missing} and "
+                    f"has_visit_report=False on {stale} appointments."
+                )
+            )
@@ -0,0 +1,17 @@
+from django.core.management.base import CommandError
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import is_naive, make_aware, utc
+
+
+def get_datetime(value):
+    """Returns an aware datetime (UTC if naive) or None from a
+    command line option.
+    """
+    if not value:
+        return None
+    dt = parse_datetime(value) or parse_datetime(f"{value}T00:00:00")
+    if not dt:
+        raise CommandError(f"Invalid datetime. Got {value}.")
+    if is_naive(dt):
+        dt = make_aware(dt, timezone=utc)
+    return dt
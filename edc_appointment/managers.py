@@ -1,6 +1,40 @@
+from collections import namedtuple
+from django.apps import apps as django_apps
 from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Q, Subquery, Value, When
 from django.db.models.deletion import ProtectedError
 from edc_visit_schedule import site_visit_schedules
+from simple_history.utils import (
+    bulk_create_with_history,
+    bulk_update_with_history,
+    get_history_manager_for_model,
+)
+
+from .appointment_list_cache import appointment_list_cache
+from .appointment_row import AppointmentRow
+from .constants import (
+    CANCELLED_APPT,
+    COMPLETE_APPT,
+    IN_PROGRESS_APPT,
+    INCOMPLETE_APPT,
+    NEW_APPT,
+)
+from .routers import get_read_database
+
+
+# the columns navigation callers need, see AppointmentManager.get_first
+AppointmentValues = namedtuple(
+    "AppointmentValues",
+    [
+        "id",
+        "visit_code",
+        "visit_code_sequence",
+        "timepoint",
+        "appt_status",
+        "appt_datetime",
+        "has_visit_report",
+    ],
+)
 
 
 class AppointmentDeleteError(Exception):
@@ -16,6 +50,12 @@ class SubjectOnScheduleError(Exception):
 
 
 class AppointmentManager(models.Manager):
+
+    summary_model = "edc_appointment.appointmentsummary"
+    # database alias for read-only navigation queries. If None,
+    # settings.EDC_APPOINTMENT_READ_DATABASE, if set.
+    read_database = None
+
     def get_by_natural_key(
         self,
         subject_identifier,
@@ -32,6 +72,33 @@ class AppointmentManager(models.Manager):
             visit_code_sequence=visit_code_sequence,
         )
 
+    def get_read_queryset(self):
+        """Returns a queryset for read-only navigation queries on
+        the read database unless reads are pinned to the primary.
+        """
+        return self.using(get_read_database(self.read_database))
+
+    def get_cached_appointments(self, **options):
+        """Returns a list of appointments from the appointment list
+        cache or None if the cache is not enabled.
+
+        `options` are field values to match and must include
+        `subject_identifier`.
+        """
+        if not appointment_list_cache.enabled or not options.get("subject_identifier"):
+            return None
+        appointments = appointment_list_cache.get_appointments(
+            self.model,
+            subject_identifier=options.get("subject_identifier"),
+            visit_schedule_name=options.get("visit_schedule_name"),
+            schedule_name=options.get("schedule_name"),
+        )
+        return [
+            obj
+            for obj in appointments
+            if all(getattr(obj, k) == v for k, v in options.items())
+        ]
+
     def get_query_options(self, **kwargs):
         """Returns an options dictionary.
 
@@ -97,6 +164,54 @@ class AppointmentManager(models.Manager):
             visit_code = None
         return visit_code
 
+    def get_first(self, options, last=None, values=None):
+        """Returns the first, or last, appointment matching
+        `options` ordered by timepoint and visit_code_sequence,
+        or None.
+
+        If `values` is True, returns an AppointmentValues named tuple
+        instead of a model instance.
+        """
+        appointments = self.get_cached_appointments(**options)
+        if appointments is None:
+            queryset = (
+                self.get_read_queryset()
+                .filter(**options)
+                .order_by("timepoint", "visit_code_sequence")
+            )
+            if values:
+                return self.get_values(queryset, last=last)
+            return queryset.last() if last else queryset.first()
+        try:
+            obj = appointments[-1] if last else appointments[0]
+        except IndexError:
+            return None
+        if values:
+            return AppointmentValues._make(
+                getattr(obj, f) for f in AppointmentValues._fields
+            )
+        return obj
+
+    @staticmethod
+    def get_values(queryset, last=None):
+        """Returns the first, or last, appointment of an ordered
+        queryset as an AppointmentValues named tuple, or None.
+        """
+        queryset = queryset.values_list(*AppointmentValues._fields)
+        row = queryset.last() if last else queryset.first()
+        return AppointmentValues._make(row) if row else None
+
+    def get_next_options(self, action, **kwargs):
+        """Returns query options for the next or previous
+        appointment.
+        """
+        options = self.get_query_options(**kwargs)
+        schedule = site_visit_schedules.get_visit_schedule(
+            options.get("visit_schedule_name")
+        ).schedules.get(options.get("schedule_name"))
+        options.update(visit_code=self.get_visit_code(action, schedule, **kwargs))
+        return options
+
     def first_appointment(self, **kwargs):
         """Returns the first appointment instance for the given criteria.
 
@@ -111,31 +226,26 @@ class AppointmentManager(models.Manager):
                 visit_schedule_name=visit_schedule_name,
                 schedule_name=schedule_name)
         """
-        options = self.get_query_options(**kwargs)
-        try:
-            first_appointment = self.filter(**options).order_by(
-                "timepoint", "visit_code_sequence"
-            )[0]
-        except IndexError:
-            first_appointment = None
-        return first_appointment
+        return self.get_first(self.get_query_options(**kwargs))
+
+    def first_appointment_values(self, **kwargs):
+        """Returns the first appointment as an AppointmentValues
+        named tuple, or None. See `first_appointment`.
+        """
+        return self.get_first(self.get_query_options(**kwargs), values=True)
 
     def last_appointment(self, **kwargs):
         """Returns the last appointment relative to the criteria.
 
         For visit_code_sequence=0.
         """
-        options = self.get_query_options(**kwargs)
-        try:
-            last_appointment = [
-                obj
-                for obj in self.filter(**options).order_by(
-                    "timepoint", "visit_code_sequence"
-                )
-            ][-1]
-        except IndexError:
-            last_appointment = None
-        return last_appointment
+        return self.get_first(self.get_query_options(**kwargs), last=True)
+
+    def last_appointment_values(self, **kwargs):
+        """Returns the last appointment as an AppointmentValues
+        named tuple, or None. See `last_appointment`.
+        """
+        return self.get_first(self.get_query_options(**kwargs), last=True, values=True)
 
     def next_appointment(self, **kwargs):
         """Returns the next appointment relative to the criteria or
@@ -158,18 +268,13 @@ class AppointmentManager(models.Manager):
                 visit_schedule_name=visit_schedule_name,
                 schedule_name=schedule_name)
         """
-        options = self.get_query_options(**kwargs)
-        schedule = site_visit_schedules.get_visit_schedule(
-            options.get("visit_schedule_name")
-        ).schedules.get(options.get("schedule_name"))
-        options.update(visit_code=self.get_visit_code("next", schedule, **kwargs))
-        try:
-            next_appointment = self.filter(**options).order_by(
-                "timepoint", "visit_code_sequence"
-            )[0]
-        except IndexError:
-            next_appointment = None
-        return next_appointment
+        return self.get_first(self.get_next_options("next", **kwargs))
+
+    def next_appointment_values(self, **kwargs):
+        """Returns the next appointment as an AppointmentValues
+        named tuple, or None. See `next_appointment`.
+        """
+        return self.get_first(self.get_next_options("next", **kwargs), values=True)
 
     def previous_appointment(self, **kwargs):
         """Returns the previous appointment relative to the criteria
@@ -177,20 +282,15 @@ class AppointmentManager(models.Manager):
 
         For visit_code_sequence=0.
         """
-        options = self.get_query_options(**kwargs)
-        schedule = site_visit_schedules.get_visit_schedule(
-            options.get("visit_schedule_name")
-        ).schedules.get(options.get("schedule_name"))
-        options.update(visit_code=self.get_visit_code("previous", schedule, **kwargs))
-        try:
-            previous_appointment = (
-                self.filter(**options)
-                .order_by("timepoint", "visit_code_sequence")
-                .reverse()[0]
-            )
-        except IndexError:
-            previous_appointment = None
-        return previous_appointment
+        return self.get_first(self.get_next_options("previous", **kwargs), last=True)
+
+    def previous_appointment_values(self, **kwargs):
+        """Returns the previous appointment as an AppointmentValues
+        named tuple, or None. See `previous_appointment`.
+        """
+        return self.get_first(
+            self.get_next_options("previous", **kwargs), last=True, values=True
+        )
 
     def delete_for_subject_after_date(
         self,
@@ -249,3 +349,376 @@ class AppointmentManager(models.Manager):
             except AppointmentDeleteError:
                 pass
         return deleted
+
+    def bulk_create_with_history(
+        self, objs, batch_size=None, history_user=None, history_change_reason=None
+    ):
+        """Returns the list of created appointments after a
+        `bulk_create` and a bulk insert of their historical records.
+
+        Like `bulk_create`, save() is not called and no signals are
+        sent. The appointment summaries and the list cache are
+        refreshed once per subject schedule.
+        """
+        objs = bulk_create_with_history(
+            objs,
+            self.model,
+            batch_size=batch_size,
+            default_user=history_user,
+            default_change_reason=history_change_reason,
+        )
+        self.refresh_appointment_summaries(objs)
+        self.bump_appointment_list_cache(objs)
+        return objs
+
+    def bulk_update_with_history(
+        self,
+        objs,
+        fields,
+        batch_size=None,
+        history_user=None,
+        history_change_reason=None,
+    ):
+        """Calls `bulk_update` and bulk inserts the historical
+        records of the appointments.
+
+        Like `bulk_update`, save() is not called and no signals are
+        sent. The appointment summaries and the list cache are
+        refreshed once per subject schedule.
+        """
+        bulk_update_with_history(
+            objs,
+            self.model,
+            fields,
+            batch_size=batch_size,
+            default_user=history_user,
+            default_change_reason=history_change_reason,
+        )
+        self.refresh_appointment_summaries(objs)
+        self.bump_appointment_list_cache(objs)
+
+    def update_with_history(
+        self,
+        queryset=None,
+        batch_size=None,
+        history_user=None,
+        history_change_reason=None,
+        **values,
+    ):
+        """Returns the number of appointments updated after a
+        queryset `update` and a bulk insert of their historical
+        records.
+
+        The updated rows are read back once to write the history
+        and refresh the appointment summaries and the list cache.
+        """
+        queryset = self.all() if queryset is None else queryset
+        with transaction.atomic(using=self.db):
+            pks = list(queryset.values_list("pk", flat=True))
+            updated = self.filter(pk__in=pks).update(**values)
+            objs = list(self.filter(pk__in=pks))
+            get_history_manager_for_model(self.model).bulk_history_create(
+                objs,
+                batch_size=batch_size,
+                update=True,
+                default_user=history_user,
+                default_change_reason=history_change_reason,
+            )
+        self.refresh_appointment_summaries(objs)
+        self.bump_appointment_list_cache(objs)
+        return updated
+
+    def refresh_appointment_summaries(self, objs):
+        """Refreshes the appointment summary of each subject
+        schedule after a bulk write, since no signals are sent.
+
+        Also resets `saved_summary_values` of each instance so a
+        later save() updates the summary from the written values.
+        """
+        summary_model_cls = django_apps.get_model(self.summary_model)
+        for subject_identifier, visit_schedule_name, schedule_name in {
+            (obj.subject_identifier, obj.visit_schedule_name, obj.schedule_name)
+            for obj in objs
+        }:
+            summary_model_cls.objects.refresh(
+                appointment_model_cls=self.model,
+                subject_identifier=subject_identifier,
+                visit_schedule_name=visit_schedule_name,
+                schedule_name=schedule_name,
+            )
+        for obj in objs:
+            obj.saved_summary_values = obj.summary_values
+
+    @staticmethod
+    def bump_appointment_list_cache(objs):
+        """Bumps the appointment list cache version of each subject
+        after a bulk write, since no signals are sent.
+        """
+        for subject_identifier in {obj.subject_identifier for obj in objs}:
+            appointment_list_cache.bump(subject_identifier)
+
+    def rows(self, queryset=None, chunk_size=None, **options):
+        """Yields AppointmentRow objects instead of model instances
+        for bulk read-only consumers.
+
+        Rows are read with `values_list` in chunks of `chunk_size`
+        (a server-side cursor on PostgreSQL). `options` filter the
+        read queryset if `queryset` is not given.
+        """
+        if queryset is None:
+            queryset = self.get_read_queryset().filter(**options)
+        for values in queryset.values_list(*AppointmentRow.fields).iterator(
+            chunk_size=chunk_size or 2000
+        ):
+            yield AppointmentRow(*values)
+
+    def update_has_visit_report(self, commit=None, **options):
+        """Returns a tuple of the number of appointments where
+        `has_visit_report` is False but a visit report exists and
+        where it is True but none exists.
+
+        If `commit` is True, also corrects them.
+        """
+        related = getattr(self.model, self.model.related_visit_model_attr()).related
+        queryset = self.filter(**options).annotate(
+            visit_report_exists=Exists(
+                related.related_model.objects.filter(
+                    **{related.field.name: OuterRef("pk")}
+                )
+            )
+        )
+        missing = queryset.filter(visit_report_exists=True, has_visit_report=False)
+        stale = queryset.filter(visit_report_exists=False, has_visit_report=True)
+        if not commit:
+            return missing.count(), stale.count()
+        subject_identifiers = set(
+            missing.values_list("subject_identifier", flat=True)
+        ) | set(stale.values_list("subject_identifier", flat=True))
+        with transaction.atomic():
+            missing = self.filter(pk__in=missing.values("pk")).update(
+                has_visit_report=True
+            )
+            stale = self.filter(pk__in=stale.values("pk")).update(
+                has_visit_report=False
+            )
+            for subject_identifier in subject_identifiers:
+                appointment_list_cache.bump(subject_identifier)
+        return missing, stale
+
+
+class AppointmentSummaryManager(models.Manager):
+
+    # the appointment each pointer refers to is the first (or, if
+    # last, the last) appointment with appt_status by `ordering`.
+    pointers = [
+        ("in_progress", IN_PROGRESS_APPT, False),
+        ("last_complete", COMPLETE_APPT, True),
+        ("next", NEW_APPT, False),
+    ]
+    ordering = ["appt_datetime", "timepoint", "visit_code_sequence"]
+    pointer_fields = {
+        "appointment_id": "id",
+        "visit_code": "visit_code",
+        "visit_code_sequence": "visit_code_sequence",
+        "appt_datetime": "appt_datetime",
+    }
+    count_fields = {
+        NEW_APPT: "new_count",
+        IN_PROGRESS_APPT: "in_progress_count",
+        INCOMPLETE_APPT: "incomplete_count",
+        COMPLETE_APPT: "complete_count",
+        CANCELLED_APPT: "cancelled_count",
+    }
+
+    def get_by_natural_key(
+        self, subject_identifier, visit_schedule_name, schedule_name
+    ):
+        return self.get(
+            subject_identifier=subject_identifier,
+            visit_schedule_name=visit_schedule_name,
+            schedule_name=schedule_name,
+        )
+
+    def refresh(
+        self,
+        appointment_model_cls=None,
+        subject_identifier=None,
+        visit_schedule_name=None,
+        schedule_name=None,
+    ):
+        """Updates, creates or deletes the summary for a subject's
+        schedule from the appointment table and returns the
+        summary instance or None.
+
+        One aggregate query and three indexed queries on the
+        subject's appointments.
+        """
+        opts = dict(
+            subject_identifier=subject_identifier,
+            visit_schedule_name=visit_schedule_name,
+            schedule_name=schedule_name,
+        )
+        appointments = appointment_model_cls.objects.filter(**opts).order_by(
+            *self.ordering
+        )
+        counts = appointments.aggregate(
+            appointment_count=Count("id"),
+            **{
+                name: Count("id", filter=Q(appt_status=appt_status))
+                for appt_status, name in self.count_fields.items()
+            },
+        )
+        if not counts.get("appointment_count"):
+            self.filter(**opts).delete()
+            return None
+        defaults = dict(site_id=appointments.values("site_id").first()["site_id"])
+        for prefix, appt_status, last in self.pointers:
+            queryset = appointments.filter(appt_status=appt_status)
+            if last:
+                queryset = queryset.reverse()
+            row = queryset.values(*self.pointer_fields.values()).first() or {}
+            defaults.update(
+                {
+                    f"{prefix}_{name}": row.get(attname)
+                    for name, attname in self.pointer_fields.items()
+                }
+            )
+        defaults.update(**counts)
+        summary, _ = self.update_or_create(defaults=defaults, **opts)
+        return summary
+
+    def update_on_save(self, appointment, created=None, previous=None):
+        """Updates the summary for a saved appointment in one
+        UPDATE query and returns the number of rows updated.
+
+        `previous` is the appointment's `summary_values` as loaded,
+        before the save. Counts are adjusted with F() expressions.
+        A pointer is moved to the appointment if it now sorts
+        before (after, if last) the appointment pointed to. If the
+        appointment pointed to leaves the status, or moves away, the
+        pointer is read again in a subquery.
+
+        Falls back to `refresh` if the summary does not exist, the
+        site changed or `previous` is unknown.
+        """
+        opts = dict(
+            subject_identifier=appointment.subject_identifier,
+            visit_schedule_name=appointment.visit_schedule_name,
+            schedule_name=appointment.schedule_name,
+        )
+        appointment_model_cls = appointment.__class__
+        old_status, old_appt_datetime, old_site_id = previous or (
+            None,
+            None,
+            appointment.site_id,
+        )
+        if (not created and not previous) or old_site_id != appointment.site_id:
+            self.refresh(appointment_model_cls=appointment_model_cls, **opts)
+            return 1
+        values = self.get_count_values(appointment, created, old_status)
+        values.update(
+            self.get_pointer_values(appointment, opts, old_status, old_appt_datetime)
+        )
+        if not values:
+            return 0
+        updated = self.filter(**opts).update(**values)
+        if not updated:
+            self.refresh(appointment_model_cls=appointment_model_cls, **opts)
+        return updated
+
+    def get_count_values(self, appointment, created, old_status):
+        """Returns the F() expressions that adjust the counts.
+        """
+        values = {}
+        if created:
+            values.update(appointment_count=F("appointment_count") + 1)
+        if old_status != appointment.appt_status:
+            if old_status in self.count_fields:
+                name = self.count_fields.get(old_status)
+                values.update({name: F(name) - 1})
+            if appointment.appt_status in self.count_fields:
+                name = self.count_fields.get(appointment.appt_status)
+                values.update({name: F(name) + 1})
+        return values
+
+    def get_pointer_values(self, appointment, opts, old_status, old_appt_datetime):
+        """Returns the Case() expressions that update the pointers.
+        """
+        values = {}
+        for prefix, appt_status, last in self.pointers:
+            reread = old_status == appt_status and (
+                appointment.appt_status != appt_status
+                or (
+                    appointment.appt_datetime < old_appt_datetime
+                    if last
+                    else appointment.appt_datetime > old_appt_datetime
+                )
+            )
+            replace = appointment.appt_status == appt_status
+            if not reread and not replace:
+                continue
+            queryset = appointment.__class__.objects.filter(
+                appt_status=appt_status, **opts
+            ).order_by(*self.ordering)
+            if last:
+                queryset = queryset.reverse()
+            is_pointer = Q(**{f"{prefix}_appointment_id": appointment.pk})
+            supersedes = Q(**{f"{prefix}_appointment_id__isnull": True}) | Q(
+                **{
+                    f"{prefix}_appt_datetime__{'lt' if last else 'gt'}": (
+                        appointment.appt_datetime
+                    )
+                }
+            )
+            for name, attname in self.pointer_fields.items():
+                field = self.model._meta.get_field(f"{prefix}_{name}")
+                whens = []
+                if reread:
+                    whens.append(
+                        When(is_pointer, then=Subquery(queryset.values(attname)[:1]))
+                    )
+                if replace:
+                    whens.append(
+                        When(
+                            is_pointer | supersedes,
+                            then=Value(getattr(appointment, attname), field),
+                        )
+                    )
+                values[field.attname] = Case(
+                    *whens, default=F(field.attname), output_field=field
+                )
+        return values
+
+    def rebuild(self, appointment_model_cls=None, **options):
+        """Refreshes summaries for all subject schedules with
+        appointments, deletes orphaned summaries and returns the
+        number of summaries refreshed.
+
+        `options` filter both models so are limited to
+        subject_identifier, visit_schedule_name and schedule_name.
+        """
+        keys = ["subject_identifier", "visit_schedule_name", "schedule_name"]
+        count = 0
+        with transaction.atomic():
+            rows = (
+                appointment_model_cls.objects.filter(**options)
+                .values(*keys)
+                .distinct()
+                .order_by(*keys)
+            )
+            for row in rows.iterator():
+                self.refresh(appointment_model_cls=appointment_model_cls, **row)
+                count += 1
+            orphans = (
+                self.filter(**options)
+                .annotate(
+                    has_appointments=Exists(
+                        appointment_model_cls.objects.filter(
+                            **{k: OuterRef(k) for k in keys}
+                        )
+                    )
+                )
+                .filter(has_appointments=False)
+            )
+            self.filter(pk__in=[obj.pk for obj in orphans]).delete()
+        return count
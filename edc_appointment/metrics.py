@@ -0,0 +1,157 @@
+import logging
+
+from contextlib import contextmanager
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.utils.module_loading import import_string
+from functools import wraps
+from time import perf_counter
+
+logger = logging.getLogger(__name__)
+
+
+class Metrics:
+
+    """A metrics backend that does nothing.
+
+    Set settings.EDC_APPOINTMENT_METRICS to the dotted path of a
+    subclass to collect metrics, e.g.
+    "edc_appointment.metrics.LoggingMetrics".
+    """
+
+    enabled = False
+
+    def emit(self, name, duration_ms=None, queries=None, rows=None):
+        pass
+
+
+class LoggingMetrics(Metrics):
+
+    """Logs one line per operation to the "edc_appointment.metrics"
+    logger.
+    """
+
+    enabled = True
+    level = logging.INFO
+
+    def emit(self, name, duration_ms=None, queries=None, rows=None):
+        logger.log(
+            self.level,
+            "%s duration_ms=%.2f queries=%s rows=%s",
+            name,
+            duration_ms,
+            queries,
+            rows,
+        )
+
+
+class StatsdMetrics(Metrics):
+
+    """Sends timings and counters to a StatsD-style client.
+
+    The client needs `timing(stat, ms)` and `incr(stat, count)`.
+    If not given, a `statsd.StatsClient` is created with
+    settings.EDC_APPOINTMENT_STATSD_OPTIONS. Requires `statsd`.
+    """
+
+    enabled = True
+    prefix = "edc_appointment"
+
+    def __init__(self, client=None):
+        if not client:
+            try:
+                from statsd import StatsClient
+            except ImportError as e:
+                raise ImproperlyConfigured(
+                    f"StatsdMetrics requires `statsd` or a client. Got {e}."
+                )
+            client = StatsClient(
+                **getattr(settings, "EDC_APPOINTMENT_STATSD_OPTIONS", {})
+            )
+        self.client = client
+
+    def emit(self, name, duration_ms=None, queries=None, rows=None):
+        self.client.timing(f"{self.prefix}.{name}.duration", duration_ms)
+        self.client.incr(f"{self.prefix}.{name}.queries", queries)
+        self.client.incr(f"{self.prefix}.{name}.rows", rows)
+
+
+class QueryCounter:
+
+    """A database execute wrapper that counts queries and the
+    rows affected by INSERT, UPDATE and DELETE statements.
+    """
+
+    write_statements = ("INSERT", "UPDATE", "DELETE")
+
+    def __init__(self):
+        self.queries = 0
+        self.rows = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        result = execute(sql, params, many, context)
+        self.queries += 1
+        if sql.lstrip()[:6].upper() in self.write_statements:
+            rowcount = context["cursor"].rowcount
+            if rowcount and rowcount > 0:
+                self.rows += rowcount
+        return result
+
+
+_metrics = {}
+
+
+def get_metrics():
+    """Returns the metrics backend from settings.
+    """
+    try:
+        return _metrics["backend"]
+    except KeyError:
+        path = getattr(settings, "EDC_APPOINTMENT_METRICS", None)
+        _metrics["backend"] = import_string(path)() if path else Metrics()
+        return _metrics["backend"]
+
+
+def reset_metrics():
+    _metrics.clear()
+
+
+@contextmanager
+def measure(name, using=None):
+    """Emits duration, query count and rows written for the
+    block to the metrics backend, if enabled.
+    """
+    metrics = get_metrics()
+    if not metrics.enabled:
+        yield
+        return
+    counter = QueryCounter()
+    start = perf_counter()
+    try:
+        with connections[using or DEFAULT_DB_ALIAS].execute_wrapper(counter):
+            yield
+    finally:
+        metrics.emit(
+            name,
+            duration_ms=(perf_counter() - start) * 1000,
+            queries=counter.queries,
+            rows=counter.rows,
+        )
+
+
+def instrumented(name):
+    """Decorator to `measure` a function or method.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not get_metrics().enabled:
+                return func(*args, **kwargs)
+            with measure(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,39 @@
+# Generated by Django 2.2.6 on 2019-11-01 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("edc_appointment", "0021_auto_20191024_1000")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["subject_identifier", "visit_code_sequence", "timepoint"],
+                name="edc_appoint_subject_b69675_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=[
+                    "subject_identifier",
+                    "visit_schedule_name",
+                    "schedule_name",
+                    "appt_status",
+                    "timepoint",
+                    "visit_code_sequence",
+                ],
+                name="edc_appoint_subject_f93a14_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["subject_identifier", "timepoint", "visit_code_sequence"],
+                name="edc_appoint_subject_cccf46_idx",
+            ),
+        ),
+    ]
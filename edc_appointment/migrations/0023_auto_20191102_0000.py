@@ -0,0 +1,19 @@
+# Generated by Django 2.2.6 on 2019-11-02 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("edc_appointment", "0022_auto_20191101_0000")]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name="appointment",
+            constraint=models.UniqueConstraint(
+                condition=models.Q(appt_status="in_progress"),
+                fields=("subject_identifier", "visit_schedule_name", "schedule_name"),
+                name="unique_in_progress_appt",
+            ),
+        )
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 2.2.6 on 2019-11-03 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("edc_appointment", "0023_auto_20191102_0000")]
+
+    operations = [
+        migrations.AddField(
+            model_name="appointment",
+            name="has_visit_report",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                editable=False,
+                help_text="Updated by the visit model post_save/post_delete signals",
+            ),
+        ),
+        migrations.AddField(
+            model_name="historicalappointment",
+            name="has_visit_report",
+            field=models.BooleanField(
+                db_index=True,
+                default=False,
+                editable=False,
+                help_text="Updated by the visit model post_save/post_delete signals",
+            ),
+        ),
+    ]
@@ -0,0 +1,179 @@
+# Generated by Django 2.2.6 on 2019-11-04 00:00
+
+import _socket
+from django.db import migrations, models
+import django.db.models.deletion
+import django_audit_fields.fields.hostname_modification_field
+import django_audit_fields.fields.userfield
+import django_audit_fields.fields.uuid_auto_field
+import django_audit_fields.models.audit_model_mixin
+import django_revision.revision_field
+import edc_sites.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("sites", "0002_alter_domain_unique"),
+        ("edc_appointment", "0024_auto_20191103_0000"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="AppointmentSummary",
+            fields=[
+                (
+                    "created",
+                    models.DateTimeField(
+                        blank=True,
+                        default=django_audit_fields.models.audit_model_mixin.utcnow,
+                    ),
+                ),
+                (
+                    "modified",
+                    models.DateTimeField(
+                        blank=True,
+                        default=django_audit_fields.models.audit_model_mixin.utcnow,
+                    ),
+                ),
+                (
+                    "user_created",
+                    django_audit_fields.fields.userfield.UserField(
+                        blank=True,
+                        help_text="Updated by admin.save_model",
+                        max_length=50,
+                        verbose_name="user created",
+                    ),
+                ),
+                (
+                    "user_modified",
+                    django_audit_fields.fields.userfield.UserField(
+                        blank=True,
+                        help_text="Updated by admin.save_model",
+                        max_length=50,
+                        verbose_name="user modified",
+                    ),
+                ),
+                (
+                    "hostname_created",
+                    models.CharField(
+                        blank=True,
+                        default=_socket.gethostname,
+                        help_text="System field. (modified on create only)",
+                        max_length=60,
+                    ),
+                ),
+                (
+                    "hostname_modified",
+                    django_audit_fields.fields.hostname_modification_field.HostnameModificationField(
+                        blank=True,
+                        help_text="System field. (modified on every save)",
+                        max_length=50,
+                    ),
+                ),
+                (
+                    "revision",
+                    django_revision.revision_field.RevisionField(
+                        blank=True,
+                        editable=False,
+                        help_text="System field. Git repository tag:branch:commit.",
+                        max_length=75,
+                        null=True,
+                        verbose_name="Revision",
+                    ),
+                ),
+                ("device_created", models.CharField(blank=True, max_length=10)),
+                ("device_modified", models.CharField(blank=True, max_length=10)),
+                (
+                    "id",
+                    django_audit_fields.fields.uuid_auto_field.UUIDAutoField(
+                        blank=True,
+                        editable=False,
+                        help_text="System auto field. UUID primary key.",
+                        primary_key=True,
+                        serialize=False,
+                    ),
+                ),
+                ("subject_identifier", models.CharField(editable=False, max_length=50)),
+                (
+                    "visit_schedule_name",
+                    models.CharField(editable=False, max_length=25),
+                ),
+                ("schedule_name", models.CharField(editable=False, max_length=25)),
+                (
+                    "in_progress_appointment_id",
+                    models.UUIDField(editable=False, null=True),
+                ),
+                (
+                    "in_progress_visit_code",
+                    models.CharField(editable=False, max_length=25, null=True),
+                ),
+                (
+                    "in_progress_visit_code_sequence",
+                    models.IntegerField(editable=False, null=True),
+                ),
+                (
+                    "in_progress_appt_datetime",
+                    models.DateTimeField(editable=False, null=True),
+                ),
+                (
+                    "last_complete_appointment_id",
+                    models.UUIDField(editable=False, null=True),
+                ),
+                (
+                    "last_complete_visit_code",
+                    models.CharField(editable=False, max_length=25, null=True),
+                ),
+                (
+                    "last_complete_visit_code_sequence",
+                    models.IntegerField(editable=False, null=True),
+                ),
+                (
+                    "last_complete_appt_datetime",
+                    models.DateTimeField(editable=False, null=True),
+                ),
+                ("next_appointment_id", models.UUIDField(editable=False, null=True)),
+                (
+                    "next_visit_code",
+                    models.CharField(editable=False, max_length=25, null=True),
+                ),
+                (
+                    "next_visit_code_sequence",
+                    models.IntegerField(editable=False, null=True),
+                ),
+                ("next_appt_datetime", models.DateTimeField(editable=False, null=True)),
+                ("appointment_count", models.IntegerField(default=0, editable=False)),
+                ("new_count", models.IntegerField(default=0, editable=False)),
+                ("in_progress_count", models.IntegerField(default=0, editable=False)),
+                ("incomplete_count", models.IntegerField(default=0, editable=False)),
+                ("complete_count", models.IntegerField(default=0, editable=False)),
+                ("cancelled_count", models.IntegerField(default=0, editable=False)),
+                (
+                    "site",
+                    models.ForeignKey(
+                        editable=False,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="sites.Site",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Appointment summary",
+                "verbose_name_plural": "Appointment summaries",
+                "abstract": False,
+                "unique_together": {
+                    ("subject_identifier", "visit_schedule_name", "schedule_name")
+                },
+            },
+            managers=[("on_site", edc_sites.models.CurrentSiteManager())],
+        ),
+        migrations.AddIndex(
+            model_name="appointmentsummary",
+            index=models.Index(
+                fields=["site", "next_appt_datetime"],
+                name="edc_appoint_site_id_b71a84_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 2.2.6 on 2019-11-06 00:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("edc_appointment", "0025_auto_20191104_0000")]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                fields=["site", "appt_datetime"], name="edc_appoint_site_id_837141_idx"
+            ),
+        )
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 2.2.6 on 2019-11-07 00:00
+
+from django.db import migrations
+
+
+def update_has_visit_report(apps, schema_editor):
+    """Sets `has_visit_report` on appointments with a visit report.
+
+    The visit model is declared in another app and found by its
+    one-to-one field to the appointment.
+    """
+    appointment_model_cls = apps.get_model("edc_appointment", "appointment")
+    db_alias = schema_editor.connection.alias
+    for model_cls in apps.get_models():
+        for field in model_cls._meta.fields:
+            if (
+                field.one_to_one
+                and field.related_model
+                and field.related_model._meta.label_lower
+                == "edc_appointment.appointment"
+            ):
+                appointment_model_cls.objects.using(db_alias).filter(
+                    pk__in=model_cls.objects.using(db_alias).values(field.attname),
+                    has_visit_report=False,
+                ).update(has_visit_report=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [("edc_appointment", "0027_auto_20191106_0000")]
+
+    operations = [
+        migrations.RunPython(update_has_visit_report, migrations.RunPython.noop)
+    ]
@@ -1,6 +1,7 @@
 from django.core.exceptions import ObjectDoesNotExist
-from django.db import models
-from edc_visit_tracking.model_mixins import VisitModelMixin
+from django.db import DEFAULT_DB_ALIAS, connections, models
+
+from ..constants import IN_PROGRESS_APPT
 
 
 class AppointmentMethodsModelError(Exception):
@@ -20,6 +21,8 @@ class AppointmentMethodsModelMixin(models.Model):
 
     @classmethod
     def related_visit_model_attr(cls):
+        from edc_visit_tracking.model_mixins import VisitModelMixin
+
         related_visit_model_attr = None
         fields = []
         for f in cls._meta.get_fields():
@@ -41,25 +44,52 @@ class AppointmentMethodsModelMixin(models.Model):
             related_visit_model_attr = fields[0].name
         return related_visit_model_attr
 
+    @classmethod
+    def in_progress_constraint_enforced(cls, using=None):
+        """Returns True if the database enforces one appointment in
+        progress per subject schedule.
+
+        Requires a conditional unique constraint on the concrete
+        model, e.g. `unique_in_progress_appt` on Appointment, and a
+        backend that supports partial indexes. Otherwise callers
+        must check in Python.
+        """
+        connection = connections[using or DEFAULT_DB_ALIAS]
+        return connection.features.supports_partial_indexes and any(
+            isinstance(constraint, models.UniqueConstraint)
+            and constraint.condition == models.Q(appt_status=IN_PROGRESS_APPT)
+            for constraint in cls._meta.constraints
+        )
+
     @classmethod
     def visit_model_cls(cls):
         return getattr(cls, cls.related_visit_model_attr()).related.related_model
 
-    @property
-    def next_by_timepoint(self):
-        """Returns the next appointment or None of all appointments
-        for this subject for visit_code_sequence=0.
-        """
+    def get_next_by_timepoint_queryset(self):
         return (
-            self.__class__.objects.filter(
+            self.__class__.objects.get_read_queryset()
+            .filter(
                 subject_identifier=self.subject_identifier,
                 timepoint__gt=self.timepoint,
                 visit_code_sequence=0,
             )
             .order_by("timepoint")
-            .first()
         )
 
+    @property
+    def next_by_timepoint(self):
+        """Returns the next appointment or None of all appointments
+        for this subject for visit_code_sequence=0.
+        """
+        return self.get_next_by_timepoint_queryset().first()
+
+    @property
+    def next_by_timepoint_values(self):
+        """Returns the next appointment by timepoint as an
+        AppointmentValues named tuple, or None.
+        """
+        return self.__class__.objects.get_values(self.get_next_by_timepoint_queryset())
+
     @property
     def last_visit_code_sequence(self):
         """Returns an integer, or None, that is the visit_code_sequence
@@ -68,7 +98,7 @@ class AppointmentMethodsModelMixin(models.Model):
 
         A sequence would be 1000.0, 1000.1, 1000.2, ...
         """
-        obj = (
+        return (
             self.__class__.objects.filter(
                 subject_identifier=self.subject_identifier,
                 visit_schedule_name=self.visit_schedule_name,
@@ -77,11 +107,9 @@ class AppointmentMethodsModelMixin(models.Model):
                 visit_code_sequence__gt=self.visit_code_sequence,
             )
             .order_by("visit_code_sequence")
+            .values_list("visit_code_sequence", flat=True)
             .last()
         )
-        if obj:
-            return obj.visit_code_sequence
-        return None
 
     @property
     def next_visit_code_sequence(self):
@@ -89,8 +117,9 @@ class AppointmentMethodsModelMixin(models.Model):
 
         A sequence would be 1000.0, 1000.1, 1000.2, ...
         """
-        if self.last_visit_code_sequence:
-            return self.last_visit_code_sequence + 1
+        last_visit_code_sequence = self.last_visit_code_sequence
+        if last_visit_code_sequence:
+            return last_visit_code_sequence + 1
         return self.visit_code_sequence + 1
 
     def get_last_appointment_with_visit_report(self):
@@ -100,34 +129,42 @@ class AppointmentMethodsModelMixin(models.Model):
         Ordering is by appointment timepoint/visit_code_sequence
         with a completed visit report.
         """
-        appointment = None
-        visit = (
-            self.__class__.visit_model_cls()
-            .objects.filter(
-                appointment__subject_identifier=self.subject_identifier,
+        return (
+            self.__class__.objects.filter(
+                subject_identifier=self.subject_identifier,
                 visit_schedule_name=self.visit_schedule_name,
                 schedule_name=self.schedule_name,
+                has_visit_report=True,
             )
-            .order_by("appointment__timepoint", "appointment__visit_code_sequence")
+            .order_by("timepoint", "visit_code_sequence")
             .last()
         )
-        if visit:
-            appointment = visit.appointment
-        return appointment
 
-    @property
-    def previous_by_timepoint(self):
-        """Returns the previous appointment or None by timepoint
-        for visit_code_sequence=0.
-        """
+    def get_previous_by_timepoint_queryset(self):
         return (
-            self.__class__.objects.filter(
+            self.__class__.objects.get_read_queryset()
+            .filter(
                 subject_identifier=self.subject_identifier,
                 timepoint__lt=self.timepoint,
                 visit_code_sequence=0,
             )
             .order_by("timepoint")
-            .last()
+        )
+
+    @property
+    def previous_by_timepoint(self):
+        """Returns the previous appointment or None by timepoint
+        for visit_code_sequence=0.
+        """
+        return self.get_previous_by_timepoint_queryset().last()
+
+    @property
+    def previous_by_timepoint_values(self):
+        """Returns the previous appointment by timepoint as an
+        AppointmentValues named tuple, or None.
+        """
+        return self.__class__.objects.get_values(
+            self.get_previous_by_timepoint_queryset(), last=True
         )
 
     @property
@@ -137,13 +174,15 @@ class AppointmentMethodsModelMixin(models.Model):
         """
         return self.get_previous()
 
-    def get_previous(self, include_interim=None):
+    def get_previous(self, include_interim=None, values=None):
         """Returns the previous appointment model instance,
         or None, in this schedule.
 
         Keywords:
             * include_interim: include interim appointments
               (e.g. those where visit_code_sequence != 0)
+            * values: return an AppointmentValues named tuple
+              instead of a model instance.
         """
         opts = dict(
             subject_identifier=self.subject_identifier,
@@ -157,10 +196,13 @@ class AppointmentMethodsModelMixin(models.Model):
         elif not include_interim:
             opts.update(visit_code_sequence=0)
         appointments = (
-            self.__class__.objects.filter(**opts)
+            self.__class__.objects.get_read_queryset()
+            .filter(**opts)
             .exclude(id=self.id)
             .order_by("timepoint", "visit_code_sequence")
         )
+        if values:
+            return self.__class__.objects.get_values(appointments, last=True)
         try:
             previous_appt = appointments.reverse()[0]
         except IndexError:
@@ -183,7 +225,7 @@ class AppointmentMethodsModelMixin(models.Model):
                     visit_code=next_visit.code,
                     visit_code_sequence=0,
                 )
-                next_appt = self.__class__.objects.get(**options)
+                next_appt = self.__class__.objects.get_read_queryset().get(**options)
             except ObjectDoesNotExist:
                 pass
         return next_appt
@@ -80,11 +80,41 @@ class AppointmentModelMixin(
 
     is_confirmed = models.BooleanField(default=False, editable=False)
 
+    has_visit_report = models.BooleanField(
+        default=False,
+        db_index=True,
+        editable=False,
+        help_text="Updated by the visit model post_save/post_delete signals",
+    )
+
     objects = AppointmentManager()
 
+    # `summary_values` as loaded or last summarised, see
+    # AppointmentSummaryManager.update_on_save
+    saved_summary_values = None
+
     def __str__(self):
         return f"{self.visit_code}.{self.visit_code_sequence}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance.saved_summary_values = instance.summary_values
+        return instance
+
+    @property
+    def summary_values(self):
+        """Returns a tuple of the values the appointment summary is
+        maintained from or None if any are deferred.
+        """
+        try:
+            return tuple(
+                self.__dict__[attname]
+                for attname in ["appt_status", "appt_datetime", "site_id"]
+            )
+        except KeyError:
+            return None
+
     def natural_key(self):
         return (
             self.subject_identifier,
@@ -146,5 +176,24 @@ class AppointmentModelMixin(
                     "timepoint",
                     "visit_code_sequence",
                 ]
-            )
+            ),
+            # next_by_timepoint, previous_by_timepoint
+            models.Index(
+                fields=["subject_identifier", "visit_code_sequence", "timepoint"]
+            ),
+            # appointments by status in a schedule, e.g. IN_PROGRESS_APPT
+            models.Index(
+                fields=[
+                    "subject_identifier",
+                    "visit_schedule_name",
+                    "schedule_name",
+                    "appt_status",
+                    "timepoint",
+                    "visit_code_sequence",
+                ]
+            ),
+            # all appointments for a subject, e.g. the dashboard
+            models.Index(
+                fields=["subject_identifier", "timepoint", "visit_code_sequence"]
+            ),
         ]
@@ -1,7 +1,9 @@
+from django.db import models
 from edc_model.models import BaseUuidModel, HistoricalRecords
 from edc_sites.models import CurrentSiteManager, SiteModelMixin
 
-from .managers import AppointmentManager
+from .constants import IN_PROGRESS_APPT
+from .managers import AppointmentManager, AppointmentSummaryManager
 from .model_mixins import AppointmentModelMixin
 
 
@@ -25,4 +27,92 @@ class Appointment(AppointmentModelMixin, SiteModelMixin, BaseUuidModel):
     natural_key.dependencies = ["sites.Site"]
 
     class Meta(AppointmentModelMixin.Meta):
-        pass
+        constraints = [
+            # only one appointment in progress per subject schedule, see
+            # AppointmentMethodsModelMixin.in_progress_constraint_enforced
+            models.UniqueConstraint(
+                fields=["subject_identifier", "visit_schedule_name", "schedule_name"],
+                condition=models.Q(appt_status=IN_PROGRESS_APPT),
+                name="unique_in_progress_appt",
+            )
+        ]
+        indexes = AppointmentModelMixin.Meta.indexes + [
+            # date range reports and daily lists per site
+            models.Index(fields=["site", "appt_datetime"])
+        ]
+
+
+class AppointmentSummary(SiteModelMixin, BaseUuidModel):
+
+    """One row per subject schedule summarising the subject's
+    appointments for listboards and reports.
+
+    Updated incrementally by the appointment post_save signal and
+    refreshed by the post_delete signal. Rebuild with the
+    `rebuild_appointment_summaries` management command.
+    """
+
+    subject_identifier = models.CharField(max_length=50, editable=False)
+
+    visit_schedule_name = models.CharField(max_length=25, editable=False)
+
+    schedule_name = models.CharField(max_length=25, editable=False)
+
+    in_progress_appointment_id = models.UUIDField(null=True, editable=False)
+
+    in_progress_visit_code = models.CharField(max_length=25, null=True, editable=False)
+
+    in_progress_visit_code_sequence = models.IntegerField(null=True, editable=False)
+
+    in_progress_appt_datetime = models.DateTimeField(null=True, editable=False)
+
+    last_complete_appointment_id = models.UUIDField(null=True, editable=False)
+
+    last_complete_visit_code = models.CharField(
+        max_length=25, null=True, editable=False
+    )
+
+    last_complete_visit_code_sequence = models.IntegerField(null=True, editable=False)
+
+    last_complete_appt_datetime = models.DateTimeField(null=True, editable=False)
+
+    next_appointment_id = models.UUIDField(null=True, editable=False)
+
+    next_visit_code = models.CharField(max_length=25, null=True, editable=False)
+
+    next_visit_code_sequence = models.IntegerField(null=True, editable=False)
+
+    next_appt_datetime = models.DateTimeField(null=True, editable=False)
+
+    appointment_count = models.IntegerField(default=0, editable=False)
+
+    new_count = models.IntegerField(default=0, editable=False)
+
+    in_progress_count = models.IntegerField(default=0, editable=False)
+
+    incomplete_count = models.IntegerField(default=0, editable=False)
+
+    complete_count = models.IntegerField(default=0, editable=False)
+
+    cancelled_count = models.IntegerField(default=0, editable=False)
+
+    on_site = CurrentSiteManager()
+
+    objects = AppointmentSummaryManager()
+
+    def __str__(self):
+        return (
+            f"{self.subject_identifier} "
+            f"{self.visit_schedule_name}.{self.schedule_name}"
+        )
+
+    def natural_key(self):
+        return (self.subject_identifier, self.visit_schedule_name, self.schedule_name)
+
+    natural_key.dependencies = ["sites.Site"]
+
+    class Meta(BaseUuidModel.Meta):
+        verbose_name = "Appointment summary"
+        verbose_name_plural = "Appointment summaries"
+        unique_together = ["subject_identifier", "visit_schedule_name", "schedule_name"]
+        indexes = [models.Index(fields=["site", "next_appt_datetime"])]
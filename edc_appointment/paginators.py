@@ -0,0 +1,59 @@
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.core.exceptions import EmptyResultSet
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+class EstimatedCountPaginator(Paginator):
+
+    """A paginator that avoids a COUNT(*) on large tables.
+
+    If the queryset is not filtered and the database is
+    PostgreSQL, `count` is the planner estimate from `pg_class`
+    if above `estimate_threshold`. Otherwise the exact count is
+    cached for `cache_timeout` seconds per query SQL and params.
+    """
+
+    estimate_threshold = 100000
+    cache_timeout = 300
+    cache_key_prefix = "edc_appointment.paginator.count"
+
+    @cached_property
+    def count(self):
+        try:
+            query = self.object_list.query
+        except AttributeError:
+            return super().count
+        if not query.where:
+            estimate = self.get_estimated_count()
+            if estimate and estimate > self.estimate_threshold:
+                return estimate
+        try:
+            sql, params = query.sql_with_params()
+        except EmptyResultSet:
+            return 0
+        key = hashlib.md5(
+            f"{self.object_list.db}:{sql}:{params!r}".encode()
+        ).hexdigest()
+        return cache.get_or_set(
+            f"{self.cache_key_prefix}.{key}",
+            self.object_list.count,
+            self.cache_timeout,
+        )
+
+    def get_estimated_count(self):
+        """Returns the planner's row estimate for the table or None.
+        """
+        connection = connections[self.object_list.db]
+        if connection.vendor != "postgresql":
+            return None
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE relname = %s",
+                [self.object_list.model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        return int(row[0]) if row else None
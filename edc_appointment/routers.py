@@ -0,0 +1,127 @@
+import threading
+
+from contextlib import contextmanager
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, router
+
+_local = threading.local()
+
+
+def is_pinned_to_primary():
+    """Returns True if reads should not go to the read replica,
+    that is, inside `pin_to_primary` or after a write in this
+    thread since the last `unpin`.
+    """
+    return bool(getattr(_local, "pinned", 0) or getattr(_local, "written", False))
+
+
+def is_router_installed():
+    """Returns True if an AppointmentReadReplicaRouter is in
+    settings.DATABASE_ROUTERS.
+
+    Without the router, an instance read from the replica would
+    be saved back to the replica.
+    """
+    return any(isinstance(r, AppointmentReadReplicaRouter) for r in router.routers)
+
+
+def get_read_database(using=None):
+    """Returns the database alias for read-only appointment queries
+    or None to use the default routing.
+
+    `using` defaults to settings.EDC_APPOINTMENT_READ_DATABASE and
+    is ignored unless the router is installed.
+    """
+    using = using or getattr(settings, "EDC_APPOINTMENT_READ_DATABASE", None)
+    if not using or is_pinned_to_primary() or not is_router_installed():
+        return None
+    return using
+
+
+@contextmanager
+def pin_to_primary():
+    """Sends reads to the primary database for the block.
+
+    Also a decorator, e.g. `@pin_to_primary()`.
+    """
+    _local.pinned = getattr(_local, "pinned", 0) + 1
+    try:
+        yield
+    finally:
+        _local.pinned -= 1
+
+
+def unpin():
+    """Forgets writes made in this thread, e.g. at the end of
+    a request.
+    """
+    _local.written = False
+
+
+@contextmanager
+def pinning_scope():
+    """Limits pinning after a write to the block, e.g. a request,
+    task or management command, so that long-running processes
+    do not stay pinned to the primary.
+
+    Writes are forgotten on entering and leaving the outermost
+    block. Also a decorator, e.g. `@pinning_scope()`.
+    """
+    depth = getattr(_local, "scope_depth", 0)
+    if not depth:
+        unpin()
+    _local.scope_depth = depth + 1
+    try:
+        yield
+    finally:
+        _local.scope_depth = depth
+        if not depth:
+            unpin()
+
+
+class AppointmentReadReplicaRouter:
+
+    """A database router that enables reading appointment
+    navigation queries from settings.EDC_APPOINTMENT_READ_DATABASE.
+
+    Only querysets from `AppointmentManager.get_read_queryset` read
+    the replica; other reads use the default routing. If a read
+    database is configured, every write goes to the primary, so a
+    model related to an instance read from the replica, e.g. a
+    visit report, is not saved to the replica.
+
+    Any write pins reads to the primary database until `unpin` is
+    called. Add `PinToPrimaryMiddleware` to unpin per request and
+    use `pinning_scope` for tasks.
+
+    For example:
+        DATABASE_ROUTERS = ["edc_appointment.routers.AppointmentReadReplicaRouter"]
+        EDC_APPOINTMENT_READ_DATABASE = "replica"
+    """
+
+    def db_for_write(self, model, **hints):
+        _local.written = True
+        if getattr(settings, "EDC_APPOINTMENT_READ_DATABASE", None):
+            return DEFAULT_DB_ALIAS
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = [DEFAULT_DB_ALIAS]
+        if getattr(settings, "EDC_APPOINTMENT_READ_DATABASE", None):
+            databases.append(settings.EDC_APPOINTMENT_READ_DATABASE)
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
+
+
+class PinToPrimaryMiddleware:
+
+    """Scopes pinning after a write to each request.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with pinning_scope():
+            return self.get_response(request)
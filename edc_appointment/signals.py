@@ -1,22 +1,29 @@
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models.signals import post_save, pre_delete
+from django.core.signals import setting_changed
+from django.db.models.signals import class_prepared, post_delete, post_save, pre_delete
 from django.dispatch import receiver
 from edc_utils import formatted_datetime
 from edc_utils import get_utcnow
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
 
+from .appointment_config import appointment_registry
+from .appointment_list_cache import appointment_list_cache
 from .managers import AppointmentDeleteError
-from .models import Appointment
+from .model_mixins import AppointmentModelMixin
+from .models import Appointment, AppointmentSummary
 
 
 @receiver(post_save, weak=False, dispatch_uid="create_appointments_on_post_save")
 def create_appointments_on_post_save(sender, instance, raw, created, using, **kwargs):
     if not raw and not kwargs.get("update_fields"):
-        try:
-            instance.create_appointments()
-        except AttributeError as e:
-            if "create_appointments" not in str(e):
-                raise
+        from .metrics import measure
+
+        with measure("signals.create_appointments_on_post_save"):
+            try:
+                instance.create_appointments()
+            except AttributeError as e:
+                if "create_appointments" not in str(e):
+                    raise
 
 
 @receiver(post_save, weak=False, dispatch_uid="appointment_post_save")
@@ -25,52 +32,212 @@ def appointment_post_save(sender, instance, raw, created, using, **kwargs):
     field is empty.
     """
     if not raw:
-        try:
-            if not instance.time_point_status:
-                instance.time_point_status
-                instance.save(update_fields=["time_point_status"])
-        except AttributeError as e:
-            if "time_point_status" not in str(e):
-                raise
+        from .metrics import measure
+
+        with measure("signals.appointment_post_save"):
+            try:
+                if not instance.time_point_status:
+                    instance.time_point_status
+                    instance.save(update_fields=["time_point_status"])
+            except AttributeError as e:
+                if "time_point_status" not in str(e):
+                    raise
 
 
 @receiver(pre_delete, weak=False, dispatch_uid="appointments_on_pre_delete")
 def appointments_on_pre_delete(sender, instance, using, **kwargs):
     if sender == Appointment:
-        if instance.visit_code_sequence == 0:
-            schedule = site_visit_schedules.get_visit_schedule(
-                instance.visit_schedule_name
-            ).schedules.get(instance.schedule_name)
-            onschedule_datetime = schedule.onschedule_model_cls.objects.get(
-                subject_identifier=instance.subject_identifier
-            ).onschedule_datetime
-            try:
-                offschedule_datetime = schedule.offschedule_model_cls.objects.get(
+        from .metrics import measure
+
+        with measure("signals.appointments_on_pre_delete"):
+            if instance.visit_code_sequence == 0:
+                schedule = site_visit_schedules.get_visit_schedule(
+                    instance.visit_schedule_name
+                ).schedules.get(instance.schedule_name)
+                onschedule_datetime = schedule.onschedule_model_cls.objects.get(
                     subject_identifier=instance.subject_identifier
-                ).offschedule_datetime
-            except ObjectDoesNotExist:
-                raise AppointmentDeleteError(
-                    f"Appointment may not be deleted. "
-                    f"Subject {instance.subject_identifier} is on schedule "
-                    f"'{instance.visit_schedule.verbose_name}.{instance.schedule_name}' "
-                    f"as of '{formatted_datetime(onschedule_datetime)}'. "
-                    f"Got appointment datetime {formatted_datetime(instance.appt_datetime)}. "
-                    f"Perhaps complete off schedule model "
-                    f"'{instance.schedule.offschedule_model_cls().verbose_name.title()}' "
-                    f"first."
-                )
-            else:
-                if (
-                    onschedule_datetime
-                    <= instance.appt_datetime
-                    <= offschedule_datetime
-                ):
+                ).onschedule_datetime
+                try:
+                    offschedule_datetime = schedule.offschedule_model_cls.objects.get(
+                        subject_identifier=instance.subject_identifier
+                    ).offschedule_datetime
+                except ObjectDoesNotExist:
                     raise AppointmentDeleteError(
                         f"Appointment may not be deleted. "
                         f"Subject {instance.subject_identifier} is on schedule "
-                        f"'{instance.visit_schedule.verbose_name}.{instance.schedule_name}' "
-                        f"as of '{formatted_datetime(onschedule_datetime)}' "
-                        f"until '{formatted_datetime(get_utcnow())}'. "
+                        f"'{instance.visit_schedule.verbose_name}."
+                        f"{instance.schedule_name}' "
+                        f"as of '{formatted_datetime(onschedule_datetime)}'. "
                         f"Got appointment datetime "
                         f"{formatted_datetime(instance.appt_datetime)}. "
+                        f"Perhaps complete off schedule model "
+                        f"'{instance.schedule.offschedule_model_cls().verbose_name.title()}' "
+                        f"first."
                     )
+                else:
+                    if (
+                        onschedule_datetime
+                        <= instance.appt_datetime
+                        <= offschedule_datetime
+                    ):
+                        raise AppointmentDeleteError(
+                            f"Appointment may not be deleted. "
+                            f"Subject {instance.subject_identifier} is on schedule "
+                            f"'{instance.visit_schedule.verbose_name}."
+                            f"{instance.schedule_name}' "
+                            f"as of '{formatted_datetime(onschedule_datetime)}' "
+                            f"until '{formatted_datetime(get_utcnow())}'. "
+                            f"Got appointment datetime "
+                            f"{formatted_datetime(instance.appt_datetime)}. "
+                        )
+
+
+@receiver(post_save, weak=False, dispatch_uid="holiday_on_post_save")
+@receiver(post_delete, weak=False, dispatch_uid="holiday_on_post_delete")
+def holiday_on_post_save_or_delete(sender, instance, using, **kwargs):
+    """Clear the facility calendars if a holiday changes.
+    """
+    if sender._meta.label_lower == "edc_facility.holiday":
+        from .facility_calendar import facility_calendars
+
+        facility_calendars.clear()
+
+
+@receiver(
+    class_prepared, weak=False, dispatch_uid="appointment_registry_on_class_prepared"
+)
+def appointment_registry_on_class_prepared(sender, **kwargs):
+    """Clear the appointment registry if the app registry changes.
+    """
+    appointment_registry.clear()
+
+
+@receiver(
+    setting_changed,
+    weak=False,
+    dispatch_uid="appointment_registry_on_setting_changed",
+)
+def appointment_registry_on_setting_changed(sender, setting, **kwargs):
+    """Clear the appointment registry if INSTALLED_APPS changes,
+    for example, with `override_settings`.
+    """
+    if setting == "INSTALLED_APPS":
+        appointment_registry.clear()
+
+
+@receiver(
+    setting_changed,
+    weak=False,
+    dispatch_uid="appointment_tags_on_setting_changed",
+)
+def appointment_tags_on_setting_changed(sender, setting, **kwargs):
+    """Rebuild the template filter label tables if the
+    abbreviations setting changes.
+    """
+    if setting == "EDC_APPOINTMENT_APPT_TYPE_ABBREVIATIONS":
+        from .templatetags.appointment_tags import get_label_tables, label_tables
+
+        label_tables.update(get_label_tables())
+
+
+@receiver(
+    setting_changed,
+    weak=False,
+    dispatch_uid="metrics_on_setting_changed",
+)
+def metrics_on_setting_changed(sender, setting, **kwargs):
+    if setting in ["EDC_APPOINTMENT_METRICS", "EDC_APPOINTMENT_STATSD_OPTIONS"]:
+        from .metrics import reset_metrics
+
+        reset_metrics()
+
+
+@receiver(post_save, weak=False, dispatch_uid="visit_report_on_post_save")
+def visit_report_on_post_save(sender, instance, raw, created, using, **kwargs):
+    """Set `has_visit_report` on the appointment when a visit
+    report is saved.
+    """
+    from edc_visit_tracking.model_mixins import VisitModelMixin
+
+    if not raw and isinstance(instance, VisitModelMixin):
+        update_has_visit_report(instance, True, using)
+
+
+@receiver(post_delete, weak=False, dispatch_uid="visit_report_on_post_delete")
+def visit_report_on_post_delete(sender, instance, using, **kwargs):
+    """Unset `has_visit_report` on the appointment when a visit
+    report is deleted.
+    """
+    from edc_visit_tracking.model_mixins import VisitModelMixin
+
+    if isinstance(instance, VisitModelMixin):
+        update_has_visit_report(instance, False, using)
+
+
+def update_has_visit_report(visit, has_visit_report, using):
+    """Updates the appointment row, if not already set, without
+    a save() and, if cached, the visit's appointment instance.
+    """
+    appointment_model_cls = visit._meta.get_field("appointment").related_model
+    appointment_model_cls.objects.using(using).filter(pk=visit.appointment_id).exclude(
+        has_visit_report=has_visit_report
+    ).update(has_visit_report=has_visit_report)
+    appointment = visit._state.fields_cache.get("appointment")
+    if appointment:
+        appointment.has_visit_report = has_visit_report
+
+
+@receiver(post_save, weak=False, dispatch_uid="appointment_summary_on_post_save")
+def appointment_summary_on_post_save(sender, instance, raw, created, **kwargs):
+    """Update the subject's appointment summary from the saved
+    appointment unless only fields not summarised were updated,
+    e.g. time_point_status.
+    """
+    update_fields = kwargs.get("update_fields")
+    if (
+        not raw
+        and isinstance(instance, AppointmentModelMixin)
+        and (not update_fields or set(update_fields) & summary_fields)
+    ):
+        AppointmentSummary.objects.update_on_save(
+            instance, created=created, previous=instance.saved_summary_values
+        )
+        instance.saved_summary_values = instance.summary_values
+
+
+@receiver(post_delete, weak=False, dispatch_uid="appointment_summary_on_post_delete")
+def appointment_summary_on_post_delete(sender, instance, **kwargs):
+    if isinstance(instance, AppointmentModelMixin):
+        refresh_appointment_summary(instance)
+
+
+summary_fields = {
+    "appt_status",
+    "appt_datetime",
+    "visit_code",
+    "visit_code_sequence",
+    "timepoint",
+    "site",
+}
+
+
+def refresh_appointment_summary(appointment):
+    AppointmentSummary.objects.refresh(
+        appointment_model_cls=appointment.__class__,
+        subject_identifier=appointment.subject_identifier,
+        visit_schedule_name=appointment.visit_schedule_name,
+        schedule_name=appointment.schedule_name,
+    )
+
+
+@receiver(post_save, weak=False, dispatch_uid="appointment_list_cache_on_post_save")
+@receiver(post_delete, weak=False, dispatch_uid="appointment_list_cache_on_post_delete")
+def appointment_list_cache_on_post_save_or_delete(sender, instance, **kwargs):
+    """Bump the subject's appointment list cache version when an
+    appointment or visit report is saved or deleted.
+    """
+    if appointment_list_cache.enabled and not kwargs.get("raw"):
+        from edc_visit_tracking.model_mixins import VisitModelMixin
+
+        if isinstance(instance, (AppointmentModelMixin, VisitModelMixin)):
+            appointment_list_cache.bump(instance.subject_identifier)
@@ -1,18 +1,52 @@
 from django import template
+from django.conf import settings
 from django.urls import reverse
-from django.apps import apps as django_apps
 from django.urls.exceptions import NoReverseMatch
+from django.utils.html import format_html
+from django.utils.http import urlencode
+
+from ..choices import APPT_REASON, APPT_STATUS, APPT_TYPE
 
 register = template.Library()
 
+DEFAULT_APPT_TYPE_ABBREVIATIONS = {
+    "clinic": "Clin",
+    "telephone": "Tele",
+    "home": "Home",
+    "hospital": "Hosp",
+}
+
+
+def get_label_tables():
+    """Returns a dictionary of value to label dictionaries for
+    the appt_type, appt_status and appt_reason filters.
+    """
+    appt_type_labels = dict(APPT_TYPE)
+    appt_type_labels.update(DEFAULT_APPT_TYPE_ABBREVIATIONS)
+    appt_type_labels.update(
+        getattr(settings, "EDC_APPOINTMENT_APPT_TYPE_ABBREVIATIONS", {})
+    )
+    return {
+        "appt_type": appt_type_labels,
+        "appt_status": dict(APPT_STATUS),
+        "appt_reason": dict(APPT_REASON),
+    }
+
+
+# updated by signal `appointment_tags_on_setting_changed`
+label_tables = get_label_tables()
+
 
 class ContinuationAppointmentUrlError(Exception):
     pass
 
 
 class ContinuationAppointmentAnchor(template.Node):
-    """Returns a reverse url for a continuation appointment
+    """Returns an anchor to add a continuation appointment
     if the appointment does not already exist.
+
+    The subject's visit codes and sequences are queried once per
+    subject schedule per render and kept in the render context.
     """
 
     def __init__(self, appointment, dashboard_type, extra_url_context):
@@ -20,52 +54,72 @@ class ContinuationAppointmentAnchor(template.Node):
         self.unresolved_dashboard_type = template.Variable(dashboard_type)
         self.unresolved_extra_url_context = template.Variable(extra_url_context)
 
-    @property
-    def appointment_model(self):
-        return django_apps.get_app_config("edc_appointment").appointment_model
+    @staticmethod
+    def get_visit_code_sequences(context, appointment):
+        """Returns a set of (visit_code, visit_code_sequence) for the
+        appointment's subject schedule.
+        """
+        cache = context.render_context.setdefault(
+            "continuation_appointment_anchor", {}
+        )
+        key = (
+            appointment._meta.label_lower,
+            appointment.subject_identifier,
+            appointment.visit_schedule_name,
+            appointment.schedule_name,
+        )
+        try:
+            visit_code_sequences = cache[key]
+        except KeyError:
+            visit_code_sequences = set(
+                appointment.__class__.objects.filter(
+                    subject_identifier=appointment.subject_identifier,
+                    visit_schedule_name=appointment.visit_schedule_name,
+                    schedule_name=appointment.schedule_name,
+                ).values_list("visit_code", "visit_code_sequence")
+            )
+            cache[key] = visit_code_sequences
+        return visit_code_sequences
 
     def render(self, context):
-        self.appointment = self.unresolved_appointment.resolve(context)
-        self.dashboard_type = self.unresolved_dashboard_type.resolve(context)
-        self.registered_subject = self.appointment.registered_subject
-        self.extra_url_context = self.unresolved_extra_url_context
-
-        if not self.extra_url_context:
-            self.extra_url_context = ""
-
-        # does a continuation appointment exist? instance will be instance+1
-        visit_code_sequences = []
-        for appointment in self.appointment_model.objects.filter(
-            registered_subject=self.appointment.registered_subject
-        ):
-            visit_code_sequences.append(int(appointment.visit_code_sequence))
-        if (int(self.appointment.visit_code_sequence) + 1) in visit_code_sequences:
-            anchor = ""
-        else:
-            view = (
-                f"admin:{self.appointment._meta.app_label}_"
-                f"{self.appointment._meta.module_name}_add"
+        appointment = self.unresolved_appointment.resolve(context)
+        dashboard_type = self.unresolved_dashboard_type.resolve(context)
+        try:
+            extra_url_context = self.unresolved_extra_url_context.resolve(context)
+        except template.VariableDoesNotExist:
+            extra_url_context = None
+
+        # does a continuation appointment exist? will be visit_code_sequence + 1
+        visit_code_sequence = int(appointment.visit_code_sequence) + 1
+        if (
+            appointment.visit_code,
+            visit_code_sequence,
+        ) in self.get_visit_code_sequences(context, appointment):
+            return ""
+        app_label = appointment._meta.app_label
+        model_name = appointment._meta.model_name
+        try:
+            url = reverse(f"{app_label}_admin:{app_label}_{model_name}_add")
+        except NoReverseMatch as e:
+            raise ContinuationAppointmentUrlError(
+                "ContinuationAppointmentUrl Tag: NoReverseMatch while "
+                f"rendering reverse for {model_name}. "
+                f"Is model registered in admin? Got {e}."
+            )
+        query_string = urlencode(
+            dict(
+                next="dashboard_url",
+                dashboard_type=dashboard_type,
+                subject_identifier=appointment.subject_identifier,
+                visit_schedule_name=appointment.visit_schedule_name,
+                schedule_name=appointment.schedule_name,
+                visit_code=appointment.visit_code,
+                visit_code_sequence=visit_code_sequence,
             )
-            try:
-                url = reverse(view)
-            except NoReverseMatch as e:
-                raise ContinuationAppointmentUrlError(
-                    "ContinuationAppointmentUrl Tag: NoReverseMatch while "
-                    "rendering reverse for {self.appointment._meta.module_name}. "
-                    f"Is model registered in admin? Got {e}."
-                )
-            else:
-                # TODO: resolve error when using extra_url_context...give back
-                # variable name ???
-                visit_code_sequence = str(int(self.appointment.visit_code_sequence) + 1)
-                rev_url = (
-                    f"{url}?next=dashboard_url&dashboard_type={self.dashboard_type}"
-                    f"&subject_identifier={self.appointment.subject_identifier}"
-                    f"&visit_definition={self.appointment.visit_definition.pk}"
-                    f"&visit_code_sequence={visit_code_sequence}"
-                )
-                anchor = f'<A href="{rev_url}">continuation</A>'
-        return anchor
+        )
+        if extra_url_context:
+            query_string = f"{query_string}&{extra_url_context}"
+        return format_html('<A href="{}?{}">continuation</A>', url, query_string)
 
 
 @register.tag(name="continuation_appointment_anchor")
@@ -83,14 +137,24 @@ def continuation_appointment_anchor(parser, token):
 
 @register.filter(name="appt_type")
 def appt_type(value):
-    """Filters appointment.appt_type.
+    """Filters appointment.appt_type to an abbreviation.
+
+    Abbreviations default to `DEFAULT_APPT_TYPE_ABBREVIATIONS` and
+    may be updated in settings.EDC_APPOINTMENT_APPT_TYPE_ABBREVIATIONS.
+    Types without an abbreviation render as their label.
+    """
+    return label_tables["appt_type"].get(value, value)
+
+
+@register.filter(name="appt_status")
+def appt_status(value):
+    """Filters appointment.appt_status to its label.
+    """
+    return label_tables["appt_status"].get(value, value)
+
+
+@register.filter(name="appt_reason")
+def appt_reason(value):
+    """Filters appointment.appt_reason to its label.
     """
-    if value == "clinic":
-        retval = "Clin"
-    elif value == "telephone":
-        retval = "Tele"
-    elif value == "home":
-        retval = "Home"
-    else:
-        retval = None
-    return retval
+    return label_tables["appt_reason"].get(value, value)
@@ -0,0 +1,171 @@
+import arrow
+
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.test.client import RequestFactory
+from edc_facility.import_holidays import import_holidays
+from edc_utils import get_utcnow
+from edc_visit_schedule import site_visit_schedules
+
+from ..admin import AppointmentAdmin
+from ..admin_site import edc_appointment_admin
+from ..list_filters import VisitCodeListFilter
+from ..models import Appointment
+from ..paginators import EstimatedCountPaginator
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestAdminPerformanceMode(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        cache.clear()
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.request = RequestFactory().get("/")
+        self.model_admin = AppointmentAdmin(Appointment, edc_appointment_admin)
+
+    def test_visit_code_list_filter_lookups(self):
+        list_filter = VisitCodeListFilter(
+            self.request, {}, Appointment, self.model_admin
+        )
+        self.assertEqual(
+            [code for code, _ in list_filter.lookups(self.request, self.model_admin)],
+            ["1000", "2000", "3000", "4000", "5000", "6000", "7000", "8000"],
+        )
+        list_filter = VisitCodeListFilter(
+            self.request, {"visit_code": "2000"}, Appointment, self.model_admin
+        )
+        self.assertEqual(
+            list_filter.queryset(self.request, Appointment.objects.all()).count(), 1
+        )
+
+    def test_get_list_filter(self):
+        self.model_admin.performance_mode = False
+        self.assertIn("visit_code", self.model_admin.get_list_filter(self.request))
+        self.assertTrue(self.model_admin.show_full_result_count)
+        self.model_admin.performance_mode = True
+        list_filter = self.model_admin.get_list_filter(self.request)
+        self.assertNotIn("visit_code", list_filter)
+        self.assertIn(VisitCodeListFilter, list_filter)
+        self.assertFalse(self.model_admin.show_full_result_count)
+
+    def test_performance_mode_read_from_settings(self):
+        with override_settings(EDC_APPOINTMENT_ADMIN_PERFORMANCE_MODE=True):
+            self.assertTrue(self.model_admin.is_performance_mode())
+            self.assertIn(
+                VisitCodeListFilter, self.model_admin.get_list_filter(self.request)
+            )
+        with override_settings(EDC_APPOINTMENT_ADMIN_PERFORMANCE_MODE=False):
+            self.assertFalse(self.model_admin.is_performance_mode())
+            self.model_admin.performance_mode = True
+            self.assertTrue(self.model_admin.is_performance_mode())
+
+    def test_paginator_count_cache_key_includes_params(self):
+        """Assert queries that print the same, e.g. IN (12345, x),
+        are not counted from the same cache key.
+        """
+        queryset = Appointment.objects.filter(
+            subject_identifier__in=[f"{self.subject_identifier}, x"]
+        )
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 0)
+        queryset = Appointment.objects.filter(
+            subject_identifier__in=[self.subject_identifier, "x"]
+        )
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 4)
+
+    def test_paginator_caches_count(self):
+        queryset = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 4)
+        with self.assertNumQueries(0):
+            self.assertEqual(EstimatedCountPaginator(queryset, 2).count, 4)
+        self.assertEqual(
+            EstimatedCountPaginator(queryset.filter(visit_code="1000"), 2).count, 1
+        )
+        self.assertEqual(EstimatedCountPaginator(queryset.none(), 2).count, 0)
+
+    def test_get_paginator(self):
+        queryset = Appointment.objects.all()
+        self.model_admin.performance_mode = True
+        self.assertIsInstance(
+            self.model_admin.get_paginator(self.request, queryset, 2),
+            EstimatedCountPaginator,
+        )
+        self.model_admin.performance_mode = False
+        self.assertNotIsInstance(
+            self.model_admin.get_paginator(self.request, queryset, 2),
+            EstimatedCountPaginator,
+        )
+
+
+class TestAdminDeletePermission(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.request = RequestFactory().get("/")
+        self.request.user = User.objects.create_superuser(
+            "erik", "erik@example.com", "password"
+        )
+        self.model_admin = AppointmentAdmin(Appointment, edc_appointment_admin)
+        self.appointments = [obj for obj in Appointment.objects.all()]
+
+    def test_on_schedule(self):
+        for appointment in self.appointments:
+            with self.subTest(appointment=appointment):
+                self.assertFalse(
+                    self.model_admin.has_delete_permission(self.request, appointment)
+                )
+
+    def test_on_schedule_future_appointment(self):
+        appointment = self.appointments[-1]
+        Appointment.objects.filter(pk=appointment.pk).update(
+            appt_datetime=get_utcnow() + relativedelta(years=1)
+        )
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        self.assertFalse(
+            self.model_admin.has_delete_permission(self.request, appointment)
+        )
+
+    def test_schedule_datetimes_loaded_once_per_request(self):
+        self.model_admin.get_schedule_datetimes(self.request, self.appointments)
+        with self.assertNumQueries(0):
+            for appointment in self.appointments:
+                self.model_admin.has_delete_permission(self.request, appointment)
+        request = RequestFactory().get("/")
+        request.user = self.request.user
+        with self.assertNumQueries(2):
+            self.model_admin.get_schedule_datetimes(request, self.appointments)
@@ -2,17 +2,24 @@ import arrow
 
 from datetime import datetime
 from dateutil.relativedelta import relativedelta, SU, MO, TU, WE, TH, FR, SA
-from decimal import Context
-from django.db import transaction
+from decimal import Context, Decimal
+from django.apps import apps as django_apps
+from django.db import connection, transaction
 from django.db.models.deletion import ProtectedError
 from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
 from edc_utils import get_utcnow
 from edc_facility.import_holidays import import_holidays
 from edc_visit_schedule import site_visit_schedules
 from edc_visit_tracking.constants import SCHEDULED
+from importlib import import_module
+from types import SimpleNamespace
+from uuid import uuid4
 
 from ..constants import INCOMPLETE_APPT, IN_PROGRESS_APPT
-from ..models import Appointment
+from ..creators import AppointmentsCreator
+from ..managers import AppointmentValues
+from ..models import Appointment, AppointmentSummary
 from ..model_mixins import AppointmentMethodsModelError
 from ..signals import AppointmentDeleteError
 from .helper import Helper
@@ -515,3 +522,258 @@ class TestAppointment(TestCase):
             ).order_by("appt_datetime")[1],
             appointment,
         )
+
+    def test_appointment_values(self):
+        """Assert values variants match the model instance variants.
+        """
+        self.helper.consent_and_put_on_schedule()
+        opts = dict(
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name="visit_schedule1",
+            schedule_name="schedule1",
+        )
+        appointments = Appointment.objects.filter(**opts).order_by("timepoint")
+        first = Appointment.objects.first_appointment_values(**opts)
+        self.assertIsInstance(first, AppointmentValues)
+        self.assertEqual(first.id, appointments[0].id)
+        self.assertEqual(first.visit_code, appointments[0].visit_code)
+        self.assertEqual(first.appt_datetime, appointments[0].appt_datetime)
+        self.assertEqual(
+            Appointment.objects.last_appointment_values(**opts).id,
+            Appointment.objects.last_appointment(**opts).id,
+        )
+        self.assertEqual(
+            Appointment.objects.next_appointment_values(appointment=appointments[0]).id,
+            appointments[1].id,
+        )
+        self.assertEqual(
+            Appointment.objects.previous_appointment_values(
+                appointment=appointments[1]
+            ).id,
+            appointments[0].id,
+        )
+        self.assertIsNone(
+            Appointment.objects.previous_appointment_values(appointment=appointments[0])
+        )
+        self.assertEqual(
+            appointments[0].next_by_timepoint_values.id, appointments[1].id
+        )
+        self.assertEqual(
+            appointments[1].previous_by_timepoint_values.id, appointments[0].id
+        )
+        self.assertEqual(
+            appointments[1].get_previous(values=True).id, appointments[0].id
+        )
+        self.assertIsNone(appointments[0].last_visit_code_sequence)
+
+    def test_has_visit_report(self):
+        self.helper.consent_and_put_on_schedule()
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint")[0]
+        self.assertFalse(appointment.has_visit_report)
+        subject_visit = SubjectVisit.objects.create(
+            appointment=appointment,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        self.assertTrue(appointment.has_visit_report)
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        self.assertTrue(appointment.has_visit_report)
+        self.assertEqual(
+            Appointment.objects.filter(
+                subject_identifier=self.subject_identifier, has_visit_report=True
+            ).count(),
+            1,
+        )
+        subject_visit.delete()
+        appointment = Appointment.objects.get(pk=appointment.pk)
+        self.assertFalse(appointment.has_visit_report)
+
+    def test_has_visit_report_set_on_visit_report_save(self):
+        self.helper.consent_and_put_on_schedule()
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint")[0]
+        subject_visit = SubjectVisit.objects.create(
+            appointment=appointment,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        Appointment.objects.filter(pk=appointment.pk).update(has_visit_report=False)
+        subject_visit = SubjectVisit.objects.get(pk=subject_visit.pk)
+        subject_visit.save()
+        self.assertTrue(Appointment.objects.get(pk=appointment.pk).has_visit_report)
+
+    def test_save_does_not_query_has_visit_report(self):
+        self.helper.consent_and_put_on_schedule()
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint")[0]
+        appointment.comment = "comment"
+        with CaptureQueriesContext(connection) as context:
+            appointment.save()
+        self.assertFalse(
+            [
+                query
+                for query in context.captured_queries
+                if query["sql"].startswith("SELECT")
+                and "has_visit_report" in query["sql"]
+            ]
+        )
+
+    def test_has_visit_report_migration(self):
+        migration = import_module("edc_appointment.migrations.0028_auto_20191107_0000")
+        self.helper.consent_and_put_on_schedule()
+        appointment = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint")[0]
+        SubjectVisit.objects.create(
+            appointment=appointment,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        Appointment.objects.update(has_visit_report=False)
+        schema_editor = SimpleNamespace(connection=connection)
+        migration.update_has_visit_report(django_apps, schema_editor)
+        self.assertEqual(
+            [
+                obj.pk
+                for obj in Appointment.objects.filter(
+                    subject_identifier=self.subject_identifier, has_visit_report=True
+                )
+            ],
+            [appointment.pk],
+        )
+
+    def test_update_has_visit_report(self):
+        self.helper.consent_and_put_on_schedule()
+        appointments = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint")
+        SubjectVisit.objects.create(
+            appointment=appointments[0],
+            report_datetime=appointments[0].appt_datetime,
+            reason=SCHEDULED,
+        )
+        self.assertEqual(Appointment.objects.update_has_visit_report(), (0, 0))
+        Appointment.objects.filter(pk=appointments[0].pk).update(
+            has_visit_report=False
+        )
+        Appointment.objects.filter(pk=appointments[1].pk).update(
+            has_visit_report=True
+        )
+        self.assertEqual(Appointment.objects.update_has_visit_report(), (1, 1))
+        self.assertEqual(
+            Appointment.objects.update_has_visit_report(commit=True), (1, 1)
+        )
+        self.assertEqual(Appointment.objects.update_has_visit_report(), (0, 0))
+        self.assertTrue(Appointment.objects.get(pk=appointments[0].pk).has_visit_report)
+        self.assertFalse(
+            Appointment.objects.get(pk=appointments[1].pk).has_visit_report
+        )
+
+    def test_delete_unused_appointments(self):
+        self.helper.consent_and_put_on_schedule()
+        appointments = [
+            obj
+            for obj in Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ).order_by("timepoint")
+        ]
+        SubjectVisit.objects.create(
+            appointment=appointments[0],
+            report_datetime=appointments[0].appt_datetime,
+            reason=SCHEDULED,
+        )
+        visit_schedule = site_visit_schedules.get_visit_schedule(
+            visit_schedule_name=appointments[0].visit_schedule_name
+        )
+        schedule = visit_schedule.schedules.get(appointments[0].schedule_name)
+        schedule.offschedule_model_cls.objects.create(
+            subject_identifier=self.subject_identifier,
+            offschedule_datetime=appointments[-1].appt_datetime
+            + relativedelta(days=1),
+        )
+        # move offschedule_datetime without the post_save signal
+        schedule.offschedule_model_cls.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).update(offschedule_datetime=appointments[0].appt_datetime)
+        creator = AppointmentsCreator(
+            subject_identifier=self.subject_identifier,
+            visit_schedule=visit_schedule,
+            schedule=schedule,
+            appointment_model=Appointment,
+        )
+        deleted, kept = creator.delete_unused_appointments()
+        self.assertEqual(deleted, 3)
+        self.assertEqual(kept, [appointments[0].pk])
+        self.assertEqual(
+            Appointment.history.filter(
+                subject_identifier=self.subject_identifier, history_type="-"
+            ).count(),
+            3,
+        )
+
+    def test_bulk_writes_with_history(self):
+        self.helper.consent_and_put_on_schedule()
+        appointments = [
+            obj
+            for obj in Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ).order_by("timepoint")
+        ]
+        history = Appointment.history.filter(subject_identifier=self.subject_identifier)
+        count = history.count()
+        for appointment in appointments:
+            appointment.appt_datetime += relativedelta(days=1)
+        Appointment.objects.bulk_update_with_history(
+            appointments, ["appt_datetime"], history_change_reason="moved"
+        )
+        self.assertEqual(history.count(), count + 4)
+        self.assertEqual(
+            history.filter(history_type="~", history_change_reason="moved").count(), 4
+        )
+        self.assertEqual(
+            history.filter(id=appointments[0].id, history_change_reason="moved")
+            .first()
+            .appt_datetime,
+            appointments[0].appt_datetime,
+        )
+        updated = Appointment.objects.update_with_history(
+            queryset=Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ),
+            appt_type="home",
+        )
+        self.assertEqual(updated, 4)
+        self.assertEqual(history.filter(history_type="~", appt_type="home").count(), 4)
+        appointment = appointments[0]
+        appointment.id = uuid4()
+        appointment.visit_code_sequence = 1
+        appointment.timepoint += Decimal("0.1")
+        Appointment.objects.bulk_create_with_history([appointment])
+        self.assertEqual(history.filter(id=appointment.id, history_type="+").count(), 1)
+
+    def test_bulk_writes_refresh_summary(self):
+        self.helper.consent_and_put_on_schedule()
+        opts = dict(subject_identifier=self.subject_identifier)
+        appointments = [obj for obj in Appointment.objects.filter(**opts)]
+        for appointment in appointments:
+            appointment.appt_datetime += relativedelta(days=1)
+        Appointment.objects.bulk_update_with_history(appointments, ["appt_datetime"])
+        summary = AppointmentSummary.objects.get(**opts)
+        self.assertEqual(summary.next_appt_datetime, appointments[0].appt_datetime)
+        Appointment.objects.update_with_history(
+            queryset=Appointment.objects.filter(visit_code="1000", **opts),
+            appt_status=IN_PROGRESS_APPT,
+        )
+        summary = AppointmentSummary.objects.get(**opts)
+        self.assertEqual(summary.in_progress_visit_code, "1000")
+        self.assertEqual(summary.new_count, 3)
+        appointment = appointments[0]
+        appointment.id = uuid4()
+        appointment.visit_code_sequence = 1
+        appointment.timepoint += Decimal("0.1")
+        Appointment.objects.bulk_create_with_history([appointment])
+        self.assertEqual(AppointmentSummary.objects.get(**opts).appointment_count, 5)
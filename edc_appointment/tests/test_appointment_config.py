@@ -1,11 +1,30 @@
+from django.apps import apps as django_apps
+from django.core.signals import setting_changed
 from django.test import TestCase, tag
+from timeit import timeit
 
-from ..appointment_config import AppointmentConfig
+from ..appointment_config import AppointmentConfig, AppointmentConfigError
+from ..appointment_config import appointment_registry
 from ..models import Appointment
 from .models import SubjectVisit
 
 
 class TestAppointmentConfig(TestCase):
+    def setUp(self):
+        appointment_registry.clear()
+        self.app_config = django_apps.get_app_config("edc_appointment")
+        self.configurations = self.app_config.configurations
+        self.app_config.configurations = [
+            AppointmentConfig(
+                model="edc_appointment.appointment",
+                related_visit_model="edc_appointment.subjectvisit",
+            )
+        ]
+
+    def tearDown(self):
+        self.app_config.configurations = self.configurations
+        appointment_registry.clear()
+
     def test_appointment_model(self):
         appt_config = AppointmentConfig(
             model="edc_appointment.appointment",
@@ -27,3 +46,53 @@ class TestAppointmentConfig(TestCase):
             model="edc_appointment.appointment",
             related_visit_model=SubjectVisit,
         )
+
+    def test_registry_get_config(self):
+        appointment_config = appointment_registry.get_config(
+            name="edc_appointment.appointment"
+        )
+        self.assertIs(appointment_config, self.app_config.configurations[0])
+        self.assertIs(appointment_registry.get_config(name=None), appointment_config)
+        self.assertRaises(
+            AppointmentConfigError, appointment_registry.get_config, name="blah"
+        )
+
+    def test_registry_get_model_cls(self):
+        self.assertEqual(
+            appointment_registry.get_model_cls(name="edc_appointment.appointment"),
+            Appointment,
+        )
+
+    def test_registry_cleared_on_setting_changed(self):
+        appointment_registry.get_model_cls(name="edc_appointment.appointment")
+        setting_changed.send(
+            sender=self.__class__, setting="INSTALLED_APPS", value=None, enter=True
+        )
+        self.assertEqual(appointment_registry._model_classes, {})
+
+    @tag("benchmark")
+    def test_registry_benchmark(self):
+        """Assert per-creator overhead of resolving the appointment
+        config and model class is less with the registry.
+        """
+        name = "edc_appointment.appointment"
+
+        def uncached():
+            [a for a in self.app_config.configurations if a.name == name][0]
+            django_apps.get_model(name)
+
+        def cached():
+            appointment_registry.get_config(name=name)
+            appointment_registry.get_model_cls(name=name)
+
+        number = 10000
+        before = timeit(uncached, number=number)
+        after = timeit(cached, number=number)
+        self.assertLess(
+            after,
+            before,
+            msg=(
+                f"Per-creator overhead before {before / number * 1e6:.2f}us, "
+                f"after {after / number * 1e6:.2f}us."
+            ),
+        )
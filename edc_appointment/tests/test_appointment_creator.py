@@ -5,6 +5,7 @@ from datetime import datetime
 from dateutil.relativedelta import relativedelta
 from django.apps import apps as django_apps
 from django.conf import settings
+from django.contrib.sites.models import Site
 from django.test import TestCase, tag
 from django.test.utils import override_settings
 from edc_utils import get_utcnow
@@ -13,7 +14,7 @@ from edc_visit_schedule import VisitSchedule, Schedule, Visit
 from edc_visit_schedule import site_visit_schedules
 
 from ..creators import AppointmentCreator
-from ..models import Appointment
+from ..models import Appointment, AppointmentSummary
 
 
 class TestAppointmentCreator(TestCase):
@@ -197,3 +198,86 @@ class TestAppointmentCreator(TestCase):
             visit=self.visit1000,
             timepoint_datetime=appt_datetime,
         )
+
+    def test_deferred_does_not_create(self):
+        appt_datetime = Arrow.fromdatetime(datetime(2017, 1, 1)).datetime
+        creator = AppointmentCreator(
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name=self.visit_schedule.name,
+            schedule_name=self.schedule.name,
+            visit=self.visit1000,
+            timepoint_datetime=appt_datetime,
+            defer=True,
+        )
+        self.assertEqual(Appointment.objects.all().count(), 0)
+        self.assertEqual(
+            creator.planned.get("appt_datetime"),
+            Arrow.fromdatetime(datetime(2017, 1, 3)).datetime,
+        )
+        appointment = creator.commit()
+        self.assertEqual(Appointment.objects.all()[0], appointment)
+        self.assertEqual(
+            appointment.appt_datetime, Arrow.fromdatetime(datetime(2017, 1, 3)).datetime
+        )
+
+    def test_flush(self):
+        appt_datetime = Arrow.fromdatetime(datetime(2017, 1, 1)).datetime
+        creators = []
+        for subject_identifier in ["12345", "67890"]:
+            creators.append(
+                AppointmentCreator(
+                    subject_identifier=subject_identifier,
+                    visit_schedule_name=self.visit_schedule.name,
+                    schedule_name=self.schedule.name,
+                    visit=self.visit1000,
+                    timepoint_datetime=appt_datetime,
+                    defer=True,
+                )
+            )
+        self.assertEqual(Appointment.objects.all().count(), 0)
+        appointments = AppointmentCreator.flush(creators)
+        self.assertEqual(Appointment.objects.all().count(), 2)
+        self.assertEqual(
+            [obj.subject_identifier for obj in appointments], ["12345", "67890"]
+        )
+        # flush again updates, not creates
+        creator = AppointmentCreator(
+            subject_identifier="12345",
+            visit_schedule_name=self.visit_schedule.name,
+            schedule_name=self.schedule.name,
+            visit=self.visit1000,
+            timepoint_datetime=Arrow.fromdatetime(datetime(2017, 1, 4)).datetime,
+            defer=True,
+        )
+        appointment = AppointmentCreator.flush([creator])[0]
+        self.assertEqual(Appointment.objects.all().count(), 2)
+        self.assertEqual(appointment.id, appointments[0].id)
+        self.assertEqual(
+            appointment.appt_datetime, Arrow.fromdatetime(datetime(2017, 1, 4)).datetime
+        )
+
+    def test_flush_writes_history_and_summary(self):
+        appt_datetime = Arrow.fromdatetime(datetime(2017, 1, 1)).datetime
+        creators = []
+        for subject_identifier in ["12345", "67890"]:
+            creators.append(
+                AppointmentCreator(
+                    subject_identifier=subject_identifier,
+                    visit_schedule_name=self.visit_schedule.name,
+                    schedule_name=self.schedule.name,
+                    visit=self.visit1000,
+                    timepoint_datetime=appt_datetime,
+                    defer=True,
+                )
+            )
+        appointments = AppointmentCreator.flush(creators)
+        for appointment in appointments:
+            self.assertEqual(appointment.site, Site.objects.get_current())
+            self.assertEqual(appointment.history.filter(history_type="+").count(), 1)
+            summary = AppointmentSummary.objects.get(
+                subject_identifier=appointment.subject_identifier,
+                visit_schedule_name=self.visit_schedule.name,
+                schedule_name=self.schedule.name,
+            )
+            self.assertEqual(summary.appointment_count, 1)
+            self.assertEqual(summary.next_appointment_id, appointment.id)
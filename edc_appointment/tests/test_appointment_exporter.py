@@ -0,0 +1,164 @@
+import arrow
+import csv
+import json
+import os
+import tempfile
+
+from datetime import datetime, timedelta
+from django.core.management import call_command
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+from edc_visit_tracking.constants import SCHEDULED
+from io import StringIO
+from unittest import skipUnless
+
+from ..appointment_exporter import AppointmentExporter, AppointmentExporterError
+from ..appointment_snapshot_exporter import AppointmentSnapshotExporter
+from ..models import Appointment
+from .helper import Helper
+from .models import SubjectVisit
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class TestAppointmentExporter(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+
+    def test_to_csv(self):
+        f = StringIO()
+        count = AppointmentExporter().to_csv(f)
+        f.seek(0)
+        rows = [row for row in csv.DictReader(f)]
+        self.assertEqual(count, 4)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            sorted([row["visit_code"] for row in rows]),
+            sorted([obj.visit_code for obj in Appointment.objects.all()]),
+        )
+
+    def test_to_jsonl_with_visit(self):
+        appointment = Appointment.objects.all().order_by("timepoint")[0]
+        SubjectVisit.objects.create(
+            appointment=appointment,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        f = StringIO()
+        AppointmentExporter(include_visit=True).to_jsonl(f)
+        rows = [json.loads(line) for line in f.getvalue().splitlines()]
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(
+            [row["id"] for row in rows if row["has_visit"]], [str(appointment.id)]
+        )
+
+    def test_filters(self):
+        self.assertEqual(
+            AppointmentExporter(visit_schedule_name="blah").queryset.count(), 0
+        )
+        self.assertEqual(
+            AppointmentExporter(
+                visit_schedule_name="visit_schedule1", schedule_name="schedule1"
+            ).queryset.count(),
+            4,
+        )
+        self.assertEqual(
+            AppointmentExporter(
+                start_datetime=arrow.Arrow(2100, 1, 1).datetime
+            ).queryset.count(),
+            0,
+        )
+        self.assertRaises(
+            AppointmentExporterError, AppointmentExporter, schedule_name="schedule1"
+        )
+
+    def test_progress(self):
+        counts = []
+        AppointmentExporter(chunk_size=3, progress=counts.append).to_csv(StringIO())
+        self.assertEqual(counts, [3, 4])
+
+    def test_command(self):
+        out = StringIO()
+        call_command(
+            "export_appointments",
+            "--format=jsonl",
+            "--visit-schedule=visit_schedule1",
+            stdout=out,
+            stderr=StringIO(),
+        )
+        self.assertEqual(len(out.getvalue().splitlines()), 4)
+
+    @skipUnless(pq, "pyarrow not installed")
+    def test_to_parquet_incremental(self):
+        path = tempfile.mkdtemp()
+        exporter = AppointmentSnapshotExporter(incremental=True)
+        self.assertEqual(exporter.to_parquet(path=path), 4)
+        partition_path = os.path.join(
+            path, "visit_schedule_name=visit_schedule1", "schedule_name=schedule1"
+        )
+        filenames = os.listdir(partition_path)
+        self.assertEqual(len(filenames), 1)
+        table = pq.read_table(os.path.join(partition_path, filenames[0]))
+        self.assertEqual(table.num_rows, 4)
+        appt_status_type = table.schema.field("appt_status").type
+        self.assertEqual(str(appt_status_type.value_type), "string")
+        self.assertEqual(str(table.schema.field("appt_datetime").type), "int64")
+        self.assertEqual(set(table.column("appt_status").to_pylist()), {"new"})
+
+        # nothing modified since the last export
+        exporter = AppointmentSnapshotExporter(
+            incremental=True, watermark_overlap=timedelta(0)
+        )
+        self.assertEqual(exporter.to_parquet(path=path), 0)
+
+        appointment = Appointment.objects.all().order_by("timepoint")[0]
+        appointment.comment = "changed"
+        appointment.save()
+        exporter = AppointmentSnapshotExporter(
+            incremental=True, watermark_overlap=timedelta(0)
+        )
+        self.assertEqual(exporter.to_parquet(path=path), 1)
+
+    @skipUnless(pq, "pyarrow not installed")
+    def test_to_parquet_incremental_overlap(self):
+        """Assert a row committed after the last export with an
+        earlier `modified` is exported within the overlap.
+        """
+        path = tempfile.mkdtemp()
+        exporter = AppointmentSnapshotExporter(incremental=True)
+        self.assertEqual(exporter.to_parquet(path=path), 4)
+        watermark = exporter.get_watermark(path=path)
+        appointment = Appointment.objects.all().order_by("timepoint")[0]
+        Appointment.objects.filter(pk=appointment.pk).update(
+            modified=watermark - timedelta(minutes=1)
+        )
+        exporter = AppointmentSnapshotExporter(
+            incremental=True, watermark_overlap=timedelta(0)
+        )
+        self.assertEqual(exporter.to_parquet(path=path), 0)
+        exporter = AppointmentSnapshotExporter(
+            incremental=True, watermark_overlap=timedelta(minutes=5)
+        )
+        self.assertEqual(exporter.to_parquet(path=path), 4)
+        self.assertEqual(exporter.get_watermark(path=path), watermark)
@@ -0,0 +1,137 @@
+import arrow
+
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from django.contrib.auth.models import User
+from django.test import TestCase
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+from io import StringIO
+
+from ..appointment_history_compactor import (
+    AppointmentHistoryCompactor,
+    AppointmentHistoryCompactorError,
+)
+from ..models import Appointment
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestAppointmentHistoryCompactor(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.appointments = [
+            obj
+            for obj in Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ).order_by("timepoint")
+        ]
+        self.history = Appointment.history.filter(
+            subject_identifier=self.subject_identifier
+        )
+
+    def test_compact(self):
+        compactor = AppointmentHistoryCompactor(chunk_size=3)
+        compactor.compact()
+        count = self.history.count()
+        for appointment in self.appointments:
+            appointment.save()
+            appointment.save()
+        self.assertEqual(self.history.count(), count + 8)
+        self.assertEqual(
+            AppointmentHistoryCompactor(chunk_size=3, dry_run=True).compact(), 8
+        )
+        self.assertEqual(self.history.count(), count + 8)
+        self.assertEqual(compactor.compact(), 8)
+        self.assertEqual(self.history.count(), count)
+        self.assertEqual(compactor.compact(), 0)
+
+    def test_compact_keeps_changes(self):
+        compactor = AppointmentHistoryCompactor()
+        compactor.compact()
+        count = self.history.count()
+        appointment = self.appointments[0]
+        appointment.appt_type = "home"
+        appointment.save()
+        appointment.appt_type = "clinic"
+        appointment.save()
+        self.assertEqual(compactor.compact(), 0)
+        self.assertEqual(self.history.count(), count + 2)
+
+    def test_compact_keeps_changes_by_another_user(self):
+        compactor = AppointmentHistoryCompactor()
+        compactor.compact()
+        count = self.history.count()
+        appointment = self.appointments[0]
+        appointment.user_modified = "another_user"
+        appointment.save()
+        appointment.save()
+        self.assertEqual(compactor.compact(), 1)
+        self.assertEqual(self.history.count(), count + 1)
+        self.assertEqual(
+            self.history.filter(id=appointment.id).first().user_modified,
+            "another_user",
+        )
+
+    def test_compact_keeps_history_user_and_change_reason(self):
+        compactor = AppointmentHistoryCompactor()
+        compactor.compact()
+        count = self.history.count()
+        appointment = self.appointments[0]
+        appointment._change_reason = "rescheduled"
+        appointment.save()
+        appointment._change_reason = None
+        appointment.save()
+        appointment._history_user = User.objects.create(username="erik")
+        appointment.save()
+        appointment._history_user = None
+        appointment.save()
+        self.assertEqual(compactor.compact(), 0)
+        self.assertEqual(self.history.count(), count + 4)
+
+    def test_archive(self):
+        visit_schedule = site_visit_schedules.get_visit_schedule(
+            visit_schedule_name=self.appointments[0].visit_schedule_name
+        )
+        schedule = visit_schedule.schedules.get(self.appointments[0].schedule_name)
+        offschedule_datetime = self.appointments[-1].appt_datetime + relativedelta(
+            days=1
+        )
+        schedule.offschedule_model_cls.objects.create(
+            subject_identifier=self.subject_identifier,
+            offschedule_datetime=offschedule_datetime,
+        )
+        count = self.history.count()
+        compactor = AppointmentHistoryCompactor(chunk_size=3)
+        f = StringIO()
+        self.assertEqual(compactor.archive(f, before=offschedule_datetime), 0)
+        self.assertEqual(
+            compactor.archive(f, before=offschedule_datetime + relativedelta(days=1)),
+            count,
+        )
+        self.assertEqual(len(f.getvalue().splitlines()), count)
+        self.assertEqual(self.history.count(), 0)
+        self.assertEqual(Appointment.objects.count(), 4)
+
+    def test_archive_requires_cutoff(self):
+        self.assertRaises(
+            AppointmentHistoryCompactorError,
+            AppointmentHistoryCompactor().archive,
+            StringIO(),
+        )
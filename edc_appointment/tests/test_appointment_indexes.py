@@ -0,0 +1,178 @@
+import arrow
+import re
+
+from datetime import datetime, timedelta
+from django.db import connection
+from django.test import TestCase, tag
+from django.test.utils import CaptureQueriesContext
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+
+from ..appointment_exporter import AppointmentExporter
+from ..form_validators import AppointmentFormValidator
+from ..models import Appointment
+from ..view_mixins import AppointmentViewMixin
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestAppointmentIndexes(TestCase):
+
+    """Assert the queries run by the manager, model mixin, form
+    validator, view mixin and exporter methods are answered by an
+    index.
+
+    The SQL is captured from the method calls and explained.
+    """
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.appointment = Appointment.objects.all().order_by("timepoint")[1]
+        if connection.vendor == "postgresql":
+            # small test tables are otherwise read sequentially
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    natural_key_columns = [
+        "subject_identifier",
+        "visit_schedule_name",
+        "schedule_name",
+        "visit_code",
+        "timepoint",
+        "visit_code_sequence",
+    ]
+    # see migrations 0022 and 0027
+    next_by_timepoint_index = "edc_appoint_subject_b69675_idx"
+    appt_status_index = "edc_appoint_subject_f93a14_idx"
+    subject_index = "edc_appoint_subject_cccf46_idx"
+    site_appt_datetime_index = "edc_appoint_site_id_837141_idx"
+    # partial unique index, see Appointment.Meta.constraints
+    in_progress_index = "unique_in_progress_appt"
+
+    def get_index_names(self, columns):
+        """Returns the names of indexes, including unique
+        constraints, on exactly `columns`.
+        """
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(
+                cursor, Appointment._meta.db_table
+            )
+        return [
+            name
+            for name, constraint in constraints.items()
+            if (constraint["index"] or constraint["unique"])
+            and constraint["columns"] == columns
+        ]
+
+    def get_select_statements(self, func):
+        """Returns the SQL of the SELECT statements on the
+        appointment table run by `func`.
+        """
+        table = connection.ops.quote_name(Appointment._meta.db_table)
+        with CaptureQueriesContext(connection) as context:
+            func()
+        return [
+            query["sql"]
+            for query in context.captured_queries
+            if query["sql"].startswith("SELECT") and f"FROM {table}" in query["sql"]
+        ]
+
+    def explain(self, sql):
+        if connection.vendor == "sqlite":
+            sql = f"EXPLAIN QUERY PLAN {sql}"
+        else:
+            sql = f"EXPLAIN {sql}"
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return "\n".join(str(row) for row in cursor.fetchall())
+
+    def assertUsesIndex(self, func, *index_names):
+        """Asserts `func` selects from the appointment table and
+        each query plan uses one of `index_names`.
+        """
+        if connection.vendor not in ["sqlite", "postgresql"]:
+            self.skipTest(f"Unsupported database vendor. Got {connection.vendor}.")
+        self.assertTrue(index_names)
+        statements = self.get_select_statements(func)
+        self.assertTrue(statements)
+        for sql in statements:
+            plan = self.explain(sql)
+            self.assertTrue(
+                any(re.search(rf"\b{name}\b", plan) for name in index_names),
+                msg=f"Expected one of {index_names}. Got {plan} for {sql}",
+            )
+
+    def test_next_and_previous_by_timepoint(self):
+        self.assertUsesIndex(
+            lambda: self.appointment.next_by_timepoint, self.next_by_timepoint_index
+        )
+        self.assertUsesIndex(
+            lambda: self.appointment.previous_by_timepoint,
+            self.next_by_timepoint_index,
+        )
+
+    def test_appointment_in_progress(self):
+        form_validator = AppointmentFormValidator(
+            cleaned_data={}, instance=self.appointment
+        )
+        self.assertUsesIndex(
+            lambda: form_validator.appointment_in_progress_exists,
+            self.appt_status_index,
+            self.in_progress_index,
+        )
+
+    def test_subject_appointments(self):
+        view = AppointmentViewMixin()
+        view.subject_identifier = self.appointment.subject_identifier
+        self.assertUsesIndex(lambda: list(view.appointments), self.subject_index)
+
+    def test_manager_queries(self):
+        natural_key_indexes = self.get_index_names(self.natural_key_columns)
+        self.assertUsesIndex(
+            lambda: Appointment.objects.first_appointment(appointment=self.appointment),
+            self.next_by_timepoint_index,
+            self.appt_status_index,
+            *natural_key_indexes,
+        )
+        self.assertUsesIndex(
+            lambda: Appointment.objects.next_appointment(appointment=self.appointment),
+            *natural_key_indexes,
+        )
+
+    def test_last_visit_code_sequence(self):
+        self.assertUsesIndex(
+            lambda: self.appointment.last_visit_code_sequence,
+            self.next_by_timepoint_index,
+            *self.get_index_names(self.natural_key_columns),
+        )
+
+    def test_appt_datetime_range(self):
+        start = self.appointment.appt_datetime.replace(hour=0, minute=0, second=0)
+        options = dict(start_datetime=start, end_datetime=start + timedelta(days=1))
+        self.assertUsesIndex(
+            lambda: list(AppointmentExporter(**options).rows()),
+            *self.get_index_names(["appt_datetime"]),
+        )
+        self.assertUsesIndex(
+            lambda: list(
+                AppointmentExporter(
+                    site_ids=[self.appointment.site_id], **options
+                ).rows()
+            ),
+            self.site_appt_datetime_index,
+        )
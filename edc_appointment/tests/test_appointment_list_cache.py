@@ -0,0 +1,138 @@
+import arrow
+
+from datetime import datetime
+from django.core.cache import cache
+from django.db import transaction
+from django.test import TransactionTestCase, override_settings
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+from edc_visit_tracking.constants import SCHEDULED
+
+from ..appointment_list_cache import appointment_list_cache
+from ..models import Appointment
+from .helper import Helper
+from .models import SubjectVisit
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    EDC_APPOINTMENT_LIST_CACHE="default",
+)
+class TestAppointmentListCache(TransactionTestCase):
+
+    """A TransactionTestCase since lists are not cached inside
+    a transaction.
+    """
+
+    helper_cls = Helper
+
+    def setUp(self):
+        import_holidays()
+        cache.clear()
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.appointments = [
+            obj
+            for obj in Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ).order_by("timepoint", "visit_code_sequence")
+        ]
+
+    def test_read_through(self):
+        with self.assertNumQueries(1):
+            appointments = Appointment.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+        self.assertEqual(
+            [obj.pk for obj in appointments], [obj.pk for obj in self.appointments]
+        )
+        with self.assertNumQueries(0):
+            appointments = Appointment.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+        self.assertEqual(
+            [obj.appt_datetime for obj in appointments],
+            [obj.appt_datetime for obj in self.appointments],
+        )
+        self.assertFalse(appointments[0]._state.adding)
+
+    def test_manager_methods_use_cache(self):
+        opts = dict(
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name=self.appointments[0].visit_schedule_name,
+            schedule_name=self.appointments[0].schedule_name,
+        )
+        Appointment.objects.first_appointment(**opts)
+        with self.assertNumQueries(0):
+            self.assertEqual(
+                Appointment.objects.first_appointment(**opts), self.appointments[0]
+            )
+            self.assertEqual(
+                Appointment.objects.last_appointment(**opts), self.appointments[-1]
+            )
+            self.assertEqual(
+                Appointment.objects.next_appointment(
+                    visit_code=self.appointments[0].visit_code, **opts
+                ),
+                self.appointments[1],
+            )
+            self.assertEqual(
+                Appointment.objects.first_appointment_values(**opts).id,
+                self.appointments[0].id,
+            )
+
+    def test_appointment_save_bumps_version(self):
+        version = appointment_list_cache.get_version(self.subject_identifier)
+        appointment = self.appointments[0]
+        appointment.comment = "changed"
+        appointment.save()
+        self.assertNotEqual(
+            appointment_list_cache.get_version(self.subject_identifier), version
+        )
+        appointments = Appointment.objects.get_cached_appointments(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(appointments[0].comment, "changed")
+
+    def test_visit_report_save_bumps_version(self):
+        version = appointment_list_cache.get_version(self.subject_identifier)
+        SubjectVisit.objects.create(
+            appointment=self.appointments[0],
+            report_datetime=self.appointments[0].appt_datetime,
+            reason=SCHEDULED,
+        )
+        self.assertNotEqual(
+            appointment_list_cache.get_version(self.subject_identifier), version
+        )
+
+    def test_not_cached_in_transaction(self):
+        with transaction.atomic():
+            Appointment.objects.filter(pk=self.appointments[0].pk).update(
+                comment="rolled back"
+            )
+            appointments = Appointment.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+            self.assertEqual(appointments[0].comment, "rolled back")
+            transaction.set_rollback(True)
+        with self.assertNumQueries(1):
+            appointments = Appointment.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+        self.assertEqual(appointments[0].comment, "")
+
+    @override_settings(EDC_APPOINTMENT_LIST_CACHE=None)
+    def test_disabled(self):
+        self.assertIsNone(
+            Appointment.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+        )
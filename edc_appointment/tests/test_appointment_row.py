@@ -0,0 +1,112 @@
+import arrow
+import gc
+import tracemalloc
+
+from datetime import datetime
+from django.test import TestCase, tag
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+
+from ..appointment_row import AppointmentRow
+from ..constants import NEW_APPT
+from ..models import Appointment
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestAppointmentRow(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+
+    def test_rows(self):
+        appointments = Appointment.objects.filter(
+            subject_identifier=self.subject_identifier
+        ).order_by("timepoint", "visit_code_sequence")
+        rows = list(
+            Appointment.objects.rows(
+                subject_identifier=self.subject_identifier, chunk_size=2
+            )
+        )
+        self.assertEqual(len(rows), appointments.count())
+        for row, appointment in zip(rows, appointments):
+            self.assertEqual(row.id, appointment.id)
+            self.assertEqual(str(row), str(appointment))
+            self.assertEqual(row.title, appointment.title)
+            self.assertEqual(
+                row.appt_status_display, appointment.get_appt_status_display()
+            )
+            visit = appointment.schedule.visits.get(appointment.visit_code)
+            self.assertEqual(row.schedule_visit, visit)
+            self.assertEqual(
+                row.window_lower, appointment.timepoint_datetime - visit.rlower
+            )
+            self.assertEqual(
+                row.window_upper, appointment.timepoint_datetime + visit.rupper
+            )
+
+    def test_rows_from_queryset(self):
+        queryset = Appointment.objects.filter(visit_code="1000")
+        self.assertEqual(
+            [row.id for row in Appointment.objects.rows(queryset=queryset)],
+            [obj.id for obj in queryset],
+        )
+
+    def test_row_is_read_only(self):
+        row = next(Appointment.objects.rows())
+        self.assertEqual(row.appt_status, NEW_APPT)
+        self.assertRaises(AttributeError, setattr, row, "appt_status", "blah")
+        self.assertFalse(hasattr(row, "__dict__"))
+        self.assertEqual(AppointmentRow(*row.values()), row)
+        self.assertEqual(list(row.as_dict()), list(AppointmentRow.fields))
+        self.assertRaises(TypeError, AppointmentRow, row.id)
+
+    @tag("benchmark")
+    def test_rows_memory_benchmark(self):
+        """Assert 100k rows use less memory than 100k model
+        instances built from the same values.
+        """
+        number = 100000
+        appointment = Appointment.objects.all()[0]
+        field_names = [f.attname for f in Appointment._meta.concrete_fields]
+        model_values = tuple(getattr(appointment, f) for f in field_names)
+        row_values = tuple(getattr(appointment, f) for f in AppointmentRow.fields)
+
+        def measure(func):
+            gc.collect()
+            tracemalloc.start()
+            try:
+                objs = [func() for _ in range(number)]
+                size = tracemalloc.get_traced_memory()[0]
+            finally:
+                tracemalloc.stop()
+            del objs
+            return size
+
+        models_size = measure(
+            lambda: Appointment.from_db("default", field_names, model_values)
+        )
+        rows_size = measure(lambda: AppointmentRow(*row_values))
+        self.assertLess(
+            rows_size,
+            models_size,
+            msg=(
+                f"{number} models {models_size / 1e6:.1f}MB, "
+                f"rows {rows_size / 1e6:.1f}MB."
+            ),
+        )
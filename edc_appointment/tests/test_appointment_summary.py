@@ -0,0 +1,160 @@
+import arrow
+
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from django.core.management import call_command
+from django.test import TestCase
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+from io import StringIO
+
+from ..constants import COMPLETE_APPT, IN_PROGRESS_APPT
+from ..models import Appointment, AppointmentSummary
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestAppointmentSummary(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.appointments = [
+            obj
+            for obj in Appointment.objects.filter(
+                subject_identifier=self.subject_identifier
+            ).order_by("timepoint")
+        ]
+
+    def test_created_with_appointments(self):
+        summary = AppointmentSummary.objects.get(
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name="visit_schedule1",
+            schedule_name="schedule1",
+        )
+        self.assertEqual(summary.appointment_count, 4)
+        self.assertEqual(summary.new_count, 4)
+        self.assertIsNone(summary.in_progress_appointment_id)
+        self.assertIsNone(summary.last_complete_appointment_id)
+        self.assertEqual(summary.next_appointment_id, self.appointments[0].id)
+        self.assertEqual(summary.next_visit_code, self.appointments[0].visit_code)
+        self.assertEqual(summary.next_appt_datetime, self.appointments[0].appt_datetime)
+        self.assertEqual(summary.site_id, self.appointments[0].site_id)
+
+    def test_updated_on_appt_status(self):
+        appointment = self.appointments[0]
+        appointment.appt_status = IN_PROGRESS_APPT
+        appointment.save()
+        summary = AppointmentSummary.objects.get(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(summary.new_count, 3)
+        self.assertEqual(summary.in_progress_count, 1)
+        self.assertEqual(summary.in_progress_appointment_id, appointment.id)
+        self.assertEqual(summary.next_appointment_id, self.appointments[1].id)
+
+        appointment.appt_status = COMPLETE_APPT
+        appointment.save()
+        summary = AppointmentSummary.objects.get(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(summary.in_progress_count, 0)
+        self.assertEqual(summary.complete_count, 1)
+        self.assertIsNone(summary.in_progress_appointment_id)
+        self.assertEqual(summary.last_complete_appointment_id, appointment.id)
+
+    def test_update_on_save_is_one_query(self):
+        appointment = self.appointments[0]
+        previous = appointment.saved_summary_values
+        appointment.appt_status = IN_PROGRESS_APPT
+        Appointment.objects.filter(pk=appointment.pk).update(
+            appt_status=IN_PROGRESS_APPT
+        )
+        with self.assertNumQueries(1):
+            AppointmentSummary.objects.update_on_save(appointment, previous=previous)
+        summary = AppointmentSummary.objects.get(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(summary.new_count, 3)
+        self.assertEqual(summary.in_progress_appointment_id, appointment.id)
+        self.assertEqual(summary.next_appointment_id, self.appointments[1].id)
+
+    def test_updated_on_appt_datetime(self):
+        appointment = self.appointments[1]
+        appt_datetime = appointment.appt_datetime
+        appointment.appt_datetime = self.appointments[0].appt_datetime - relativedelta(
+            days=1
+        )
+        appointment.save()
+        summary = AppointmentSummary.objects.get(
+            subject_identifier=self.subject_identifier
+        )
+        self.assertEqual(summary.next_appointment_id, appointment.id)
+        appointment.appt_datetime = appt_datetime
+        appointment.save()
+        fields = [
+            f"next_{name}" for name in AppointmentSummary.objects.pointer_fields
+        ] + list(AppointmentSummary.objects.count_fields.values())
+        values = AppointmentSummary.objects.values(*fields).get(pk=summary.pk)
+        AppointmentSummary.objects.refresh(
+            appointment_model_cls=Appointment,
+            subject_identifier=self.subject_identifier,
+            visit_schedule_name="visit_schedule1",
+            schedule_name="schedule1",
+        )
+        self.assertEqual(
+            AppointmentSummary.objects.values(*fields).get(pk=summary.pk), values
+        )
+        self.assertEqual(values.get("next_appointment_id"), self.appointments[0].id)
+
+    def test_refresh_deletes_without_appointments(self):
+        opts = dict(
+            subject_identifier="99999",
+            visit_schedule_name="visit_schedule1",
+            schedule_name="schedule1",
+        )
+        AppointmentSummary.objects.create(**opts)
+        summary = AppointmentSummary.objects.refresh(
+            appointment_model_cls=Appointment, **opts
+        )
+        self.assertIsNone(summary)
+        self.assertFalse(AppointmentSummary.objects.filter(**opts).exists())
+
+    def test_rebuild(self):
+        AppointmentSummary.objects.all().delete()
+        AppointmentSummary.objects.create(
+            subject_identifier="99999",
+            visit_schedule_name="visit_schedule1",
+            schedule_name="schedule1",
+        )
+        self.assertEqual(
+            AppointmentSummary.objects.rebuild(appointment_model_cls=Appointment), 1
+        )
+        self.assertEqual(
+            [obj.subject_identifier for obj in AppointmentSummary.objects.all()],
+            [self.subject_identifier],
+        )
+
+    def test_command(self):
+        AppointmentSummary.objects.all().delete()
+        call_command("rebuild_appointment_summaries", stdout=StringIO())
+        self.assertEqual(
+            AppointmentSummary.objects.get(
+                subject_identifier=self.subject_identifier
+            ).new_count,
+            4,
+        )
@@ -0,0 +1,94 @@
+import arrow
+
+from datetime import datetime
+from django.template import Context, Template
+from django.test import SimpleTestCase, TestCase, override_settings
+from edc_facility.import_holidays import import_holidays
+from edc_utils import get_utcnow
+from edc_visit_schedule import site_visit_schedules
+
+from ..choices import APPT_REASON, APPT_STATUS, APPT_TYPE
+from ..constants import INCOMPLETE_APPT, IN_PROGRESS_APPT
+from ..models import Appointment
+from ..templatetags.appointment_tags import appt_reason, appt_status, appt_type
+from .helper import Helper
+from .models import SubjectVisit
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class TestContinuationAppointmentAnchor(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        appointment = Appointment.objects.all().order_by("timepoint")[0]
+        appointment.appt_status = IN_PROGRESS_APPT
+        appointment.save()
+        SubjectVisit.objects.create(
+            appointment=appointment, report_datetime=get_utcnow()
+        )
+        appointment.appt_status = INCOMPLETE_APPT
+        appointment.save()
+        self.helper.add_unscheduled_appointment(appointment)
+        self.template = Template(
+            "{% load appointment_tags %}{% for appointment in appointments %}"
+            "[{% continuation_appointment_anchor appointment dashboard_type "
+            "extra_url_context %}]{% endfor %}"
+        )
+
+    def test_renders_with_one_query(self):
+        appointments = [
+            obj
+            for obj in Appointment.objects.all().order_by(
+                "timepoint", "visit_code_sequence"
+            )
+        ]
+        with self.assertNumQueries(1):
+            rendered = self.template.render(
+                Context(dict(appointments=appointments, dashboard_type="subject"))
+            )
+        anchors = rendered[1:-1].split("][")
+        self.assertEqual(len(anchors), 5)
+        self.assertEqual(anchors[0], "")
+        self.assertIn("visit_code=1000", anchors[1])
+        self.assertIn("visit_code_sequence=2", anchors[1])
+        for anchor in anchors[2:]:
+            self.assertIn("visit_code_sequence=1", anchor)
+
+
+class TestAppointmentFilters(SimpleTestCase):
+    def test_appt_type(self):
+        self.assertEqual(appt_type("clinic"), "Clin")
+        self.assertEqual(appt_type("telephone"), "Tele")
+        self.assertEqual(appt_type("home"), "Home")
+        for value, _ in APPT_TYPE:
+            with self.subTest(value=value):
+                self.assertIsNotNone(appt_type(value))
+        self.assertEqual(appt_type("blah"), "blah")
+
+    @override_settings(EDC_APPOINTMENT_APPT_TYPE_ABBREVIATIONS={"clinic": "C"})
+    def test_appt_type_abbreviations_from_settings(self):
+        self.assertEqual(appt_type("clinic"), "C")
+        self.assertEqual(appt_type("home"), "Home")
+
+    def test_appt_status_and_reason(self):
+        for value, label in APPT_STATUS:
+            with self.subTest(value=value):
+                self.assertEqual(appt_status(value), label)
+        for value, label in APPT_REASON:
+            with self.subTest(value=value):
+                self.assertEqual(appt_reason(value), label)
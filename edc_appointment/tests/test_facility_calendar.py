@@ -0,0 +1,85 @@
+import arrow
+
+from datetime import datetime
+from dateutil.relativedelta import relativedelta
+from django.apps import apps as django_apps
+from django.test import TestCase, tag
+from edc_facility import FacilityError
+from edc_facility.import_holidays import import_holidays
+
+from ..facility_calendar import FacilityCalendar, facility_calendars
+
+
+class TestFacilityCalendar(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        facility_calendars.clear()
+        self.app_config = django_apps.get_app_config("edc_facility")
+
+    def test_registry_returns_same_calendar(self):
+        facility = self.app_config.get_facility("5-day-clinic")
+        calendar = facility_calendars.get(facility=facility)
+        self.assertIs(
+            calendar,
+            facility_calendars.get(facility=self.app_config.get_facility("5-day-clinic")),
+        )
+        self.assertIsNot(
+            calendar,
+            facility_calendars.get(facility=self.app_config.get_facility("7-day-clinic")),
+        )
+
+    def test_same_as_facility(self):
+        """Assert calendar lookup matches a day-by-day walk by
+        the facility.
+        """
+        for name in ["7-day-clinic", "5-day-clinic", "3-day-clinic"]:
+            facility = self.app_config.get_facility(name)
+            calendar = facility_calendars.get(facility=facility)
+            for days in range(0, 40):
+                suggested_datetime = arrow.Arrow.fromdatetime(
+                    datetime(2016, 12, 15, 10, 30) + relativedelta(days=days)
+                ).datetime
+                options = dict(
+                    suggested_datetime=suggested_datetime,
+                    forward_delta=relativedelta(days=6),
+                    reverse_delta=relativedelta(days=1),
+                    taken_datetimes=[suggested_datetime],
+                )
+                with self.subTest(facility=name, suggested_datetime=suggested_datetime):
+                    self.assertEqual(
+                        facility.available_rdate(**options),
+                        calendar.available_rdate(facility=facility, **options),
+                    )
+
+    def test_extends_beyond_initial_period(self):
+        facility = self.app_config.get_facility("7-day-clinic")
+        start_date = datetime(2017, 1, 1).date()
+        calendar = FacilityCalendar(
+            facility=facility, start_date=start_date, end_date=start_date
+        )
+        suggested_datetime = arrow.Arrow.fromdatetime(datetime(2018, 6, 4)).datetime
+        rdate = calendar.available_rdate(
+            facility=facility,
+            suggested_datetime=suggested_datetime,
+            forward_delta=relativedelta(days=6),
+        )
+        self.assertEqual(rdate.datetime, suggested_datetime)
+        self.assertGreaterEqual(calendar.end_ordinal, rdate.date().toordinal())
+
+    def test_raises_if_not_best_effort(self):
+        facility = self.app_config.get_facility("5-day-clinic")
+        facility.best_effort_available_datetime = False
+        calendar = facility_calendars.get(facility=facility)
+        # Saturday with no window
+        suggested_datetime = arrow.Arrow.fromdatetime(datetime(2017, 1, 7)).datetime
+        self.assertRaises(
+            FacilityError,
+            calendar.available_rdate,
+            facility=facility,
+            suggested_datetime=suggested_datetime,
+            forward_delta=relativedelta(days=1),
+        )
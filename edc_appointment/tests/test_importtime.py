@@ -0,0 +1,144 @@
+import os
+import subprocess
+import sys
+
+from django.test import SimpleTestCase, tag
+
+import_script = """
+import sys
+import django.apps
+from django.conf import settings
+
+settings.configure(APP_NAME="importtime")
+import edc_appointment.apps
+
+print("modules:" + ",".join(sorted(sys.modules)))
+"""
+
+setup_script = """
+import django
+
+from django.conf import settings
+from time import perf_counter
+from runtests import DEFAULT_SETTINGS
+
+settings.configure(**dict(DEFAULT_SETTINGS, EDC_APPOINTMENT_READY_BANNER=False))
+
+from edc_appointment.apps import AppConfig
+
+timings = {}
+ready = AppConfig.ready
+
+
+def timed_ready(self):
+    start = perf_counter()
+    ready(self)
+    timings["ready"] = perf_counter() - start
+
+
+AppConfig.ready = timed_ready
+start = perf_counter()
+django.setup()
+timings["setup"] = perf_counter() - start
+for name, seconds in timings.items():
+    print(f"{name}:{int(seconds * 1e6)}")
+"""
+
+
+def run_script(script, *options):
+    base_dir = os.path.dirname(
+        os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    env = dict(os.environ)
+    env.update(PYTHONPATH=os.pathsep.join([base_dir] + sys.path))
+    return subprocess.run(
+        [sys.executable, *options, "-c", script],
+        cwd=base_dir,
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+        check=True,
+    )
+
+
+def get_value(result, name):
+    """Returns the value printed by the script as "name:value".
+    """
+    for line in result.stdout.splitlines():
+        key, _, value = line.partition(":")
+        if key == name:
+            return value
+    return None
+
+
+def get_import_times(result):
+    """Returns a dictionary of cumulative import time in
+    microseconds by module from the `-X importtime` output.
+    """
+    import_times = {}
+    for line in result.stderr.splitlines():
+        key, _, value = line.partition(":")
+        if key == "import time" and value.count("|") == 2:
+            _, cumulative_us, name = value.split("|")
+            try:
+                import_times[name.strip()] = int(cumulative_us)
+            except ValueError:
+                pass
+    return import_times
+
+
+class TestImportTime(SimpleTestCase):
+
+    """Asserts importing `edc_appointment.apps` outside of the
+    test settings is within budget, measured with
+    `python -X importtime`, and does not import modules only
+    needed later.
+    """
+
+    budget_us = 20000
+    lazy_modules = ["arrow", "edc_facility", "edc_protocol", "edc_utils"]
+
+    def test_apps_import_time(self):
+        import_times = get_import_times(run_script(import_script, "-X", "importtime"))
+        self.assertIn("edc_appointment.apps", import_times)
+        self.assertLessEqual(
+            import_times["edc_appointment.apps"],
+            self.budget_us,
+            msg=(
+                f"Importing edc_appointment.apps took "
+                f"{import_times['edc_appointment.apps']}us. "
+                f"Budget is {self.budget_us}us."
+            ),
+        )
+
+    def test_apps_does_not_import_lazy_modules(self):
+        modules = get_value(run_script(import_script), "modules").split(",")
+        for name in self.lazy_modules:
+            with self.subTest(name=name):
+                self.assertNotIn(name, modules)
+
+
+@tag("benchmark")
+class TestReadyTime(SimpleTestCase):
+
+    """Asserts the time of `AppConfig.ready()` during
+    `django.setup()` with the test settings.
+
+    Run with `python runtests.py --benchmark`.
+    """
+
+    budget_us = 50000
+
+    def test_ready_time(self):
+        result = run_script(setup_script)
+        ready_us = int(get_value(result, "ready"))
+        setup_us = int(get_value(result, "setup"))
+        self.assertLessEqual(
+            ready_us,
+            self.budget_us,
+            msg=(
+                f"AppConfig.ready() took {ready_us}us of {setup_us}us for "
+                f"django.setup(). Budget is {self.budget_us}us."
+            ),
+        )
@@ -0,0 +1,100 @@
+import arrow
+
+from datetime import datetime
+from django.test import TestCase, override_settings
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+
+from ..metrics import Metrics, StatsdMetrics, get_metrics, measure
+from ..models import Appointment
+from .helper import Helper
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+class RecordingMetrics(Metrics):
+
+    enabled = True
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, name, **kwargs):
+        self.records.append(dict(name=name, **kwargs))
+
+
+class DummyStatsClient:
+    def __init__(self):
+        self.stats = []
+
+    def timing(self, stat, value):
+        self.stats.append(stat)
+
+    def incr(self, stat, count=1):
+        self.stats.append(stat)
+
+
+class TestMetrics(TestCase):
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+
+    def test_disabled_by_default(self):
+        self.assertFalse(get_metrics().enabled)
+        with self.assertNumQueries(1):
+            with measure("test"):
+                Appointment.objects.count()
+
+    @override_settings(
+        EDC_APPOINTMENT_METRICS="edc_appointment.tests.test_metrics.RecordingMetrics"
+    )
+    def test_emits_for_appointment_creation(self):
+        metrics = get_metrics()
+        self.assertIsInstance(metrics, RecordingMetrics)
+        self.helper.consent_and_put_on_schedule()
+        names = [record.get("name") for record in metrics.records]
+        self.assertEqual(names.count("appointment_creator.create"), 4)
+        self.assertIn("appointments_creator.create_appointments", names)
+        self.assertIn("signals.appointment_post_save", names)
+        record = [
+            r
+            for r in metrics.records
+            if r.get("name") == "appointments_creator.create_appointments"
+        ][0]
+        self.assertGreater(record.get("queries"), 0)
+        self.assertGreaterEqual(record.get("rows"), 4)
+        self.assertGreater(record.get("duration_ms"), 0)
+
+    @override_settings(
+        EDC_APPOINTMENT_METRICS="edc_appointment.tests.test_metrics.RecordingMetrics"
+    )
+    def test_measure(self):
+        with measure("test"):
+            Appointment.objects.count()
+        self.assertEqual(get_metrics().records[0].get("queries"), 1)
+        self.assertEqual(get_metrics().records[0].get("rows"), 0)
+
+    def test_statsd_metrics(self):
+        client = DummyStatsClient()
+        StatsdMetrics(client=client).emit("test", duration_ms=1, queries=2, rows=3)
+        self.assertEqual(
+            client.stats,
+            [
+                "edc_appointment.test.duration",
+                "edc_appointment.test.queries",
+                "edc_appointment.test.rows",
+            ],
+        )
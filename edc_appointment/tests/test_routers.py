@@ -0,0 +1,195 @@
+import arrow
+
+from datetime import datetime
+from django.db import DEFAULT_DB_ALIAS
+from django.test import TestCase, override_settings, tag
+from edc_facility.import_holidays import import_holidays
+from edc_visit_schedule import site_visit_schedules
+from edc_visit_tracking.constants import SCHEDULED
+
+from ..models import Appointment
+from ..routers import (
+    PinToPrimaryMiddleware,
+    get_read_database,
+    is_pinned_to_primary,
+    pin_to_primary,
+    pinning_scope,
+    unpin,
+)
+from .helper import Helper
+from .models import SubjectVisit
+from .visit_schedule import visit_schedule1, visit_schedule2
+
+
+router = "edc_appointment.routers.AppointmentReadReplicaRouter"
+
+
+@tag("replica")
+class TestReadReplicaRouting(TestCase):
+
+    """The replica is a second, empty test database, so reads
+    sent to it find nothing.
+
+    Run with `python runtests.py --replica`.
+    """
+
+    databases = {"default", "replica"}
+
+    helper_cls = Helper
+
+    @classmethod
+    def setUpClass(cls):
+        import_holidays()
+        return super().setUpClass()
+
+    def setUp(self):
+        self.subject_identifier = "12345"
+        site_visit_schedules._registry = {}
+        site_visit_schedules.register(visit_schedule=visit_schedule1)
+        site_visit_schedules.register(visit_schedule=visit_schedule2)
+        self.helper = self.helper_cls(
+            subject_identifier=self.subject_identifier,
+            now=arrow.Arrow.fromdatetime(datetime(2017, 1, 7), tzinfo="UTC").datetime,
+        )
+        self.helper.consent_and_put_on_schedule()
+        self.appointment = Appointment.objects.all().order_by("timepoint")[0]
+        unpin()
+
+    def tearDown(self):
+        unpin()
+
+    def test_reads_primary_by_default(self):
+        with self.assertNumQueries(0, using="replica"):
+            self.assertEqual(
+                Appointment.objects.first_appointment(appointment=self.appointment),
+                self.appointment,
+            )
+            self.assertIsNotNone(self.appointment.next_by_timepoint)
+
+    @override_settings(EDC_APPOINTMENT_READ_DATABASE="replica")
+    def test_reads_primary_without_router(self):
+        self.assertIsNone(get_read_database())
+        with self.assertNumQueries(0, using="replica"):
+            self.assertEqual(
+                Appointment.objects.first_appointment(appointment=self.appointment),
+                self.appointment,
+            )
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_navigation_reads_replica(self):
+        with self.assertNumQueries(4, using="replica"):
+            self.assertIsNone(
+                Appointment.objects.first_appointment(appointment=self.appointment)
+            )
+            self.assertIsNone(
+                Appointment.objects.last_appointment(appointment=self.appointment)
+            )
+            self.assertIsNone(self.appointment.next_by_timepoint)
+            self.assertIsNone(self.appointment.next)
+        with pin_to_primary():
+            with self.assertNumQueries(0, using="replica"):
+                self.assertEqual(
+                    Appointment.objects.first_appointment(appointment=self.appointment),
+                    self.appointment,
+                )
+                self.assertIsNotNone(self.appointment.next)
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_router_reads_primary_outside_navigation(self):
+        with self.assertNumQueries(0, using="replica"):
+            self.assertEqual(
+                Appointment.objects.get(pk=self.appointment.pk), self.appointment
+            )
+            self.assertEqual(
+                Appointment.objects.filter(
+                    subject_identifier=self.subject_identifier
+                ).count(),
+                4,
+            )
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_router_pins_reads_after_write(self):
+        def exists():
+            return (
+                Appointment.objects.get_read_queryset()
+                .filter(pk=self.appointment.pk)
+                .exists()
+            )
+
+        self.assertFalse(exists())
+        Appointment.objects.filter(pk=self.appointment.pk).update(comment="comment")
+        self.assertTrue(exists())
+        unpin()
+        self.assertFalse(exists())
+
+        def get_response(request):
+            Appointment.objects.filter(pk=self.appointment.pk).update(comment="")
+            return exists()
+
+        self.assertTrue(PinToPrimaryMiddleware(get_response)(None))
+        self.assertFalse(exists())
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_pinning_scope(self):
+        appointments = Appointment.objects.filter(pk=self.appointment.pk)
+        with pinning_scope():
+            with pinning_scope():
+                appointments.update(comment="comment")
+            self.assertIsNone(get_read_database())
+        self.assertEqual(get_read_database(), "replica")
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_read_paths_do_not_pin(self):
+        Appointment.in_progress_constraint_enforced()
+        self.assertFalse(is_pinned_to_primary())
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_save_writes_primary(self):
+        appointment = Appointment.objects.using(DEFAULT_DB_ALIAS).get(
+            pk=self.appointment.pk
+        )
+        appointment._state.db = "replica"
+        appointment.comment = "comment"
+        appointment.save()
+        self.assertEqual(
+            Appointment.objects.using(DEFAULT_DB_ALIAS)
+            .get(pk=self.appointment.pk)
+            .comment,
+            "comment",
+        )
+
+    @override_settings(
+        DATABASE_ROUTERS=[router], EDC_APPOINTMENT_READ_DATABASE="replica"
+    )
+    def test_visit_saves_to_primary(self):
+        """Assert a visit report related to an appointment read from
+        the replica is saved to the primary.
+        """
+        appointment = Appointment.objects.using(DEFAULT_DB_ALIAS).get(
+            pk=self.appointment.pk
+        )
+        appointment._state.db = "replica"
+        subject_visit = SubjectVisit(
+            appointment=appointment,
+            report_datetime=appointment.appt_datetime,
+            reason=SCHEDULED,
+        )
+        self.assertEqual(subject_visit._state.db, DEFAULT_DB_ALIAS)
+        subject_visit.save()
+        self.assertTrue(
+            SubjectVisit.objects.using(DEFAULT_DB_ALIAS)
+            .filter(appointment=appointment)
+            .exists()
+        )
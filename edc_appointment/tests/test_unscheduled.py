@@ -1,13 +1,17 @@
 import arrow
 
 from datetime import datetime
+from django.db import connection, transaction
+from django.db.utils import IntegrityError
 from django.test import TestCase, tag
 from edc_facility.import_holidays import import_holidays
 from edc_utils import get_utcnow
 from edc_visit_schedule.site_visit_schedules import site_visit_schedules
+from unittest.mock import patch
 
 from ..constants import NEW_APPT, INCOMPLETE_APPT, IN_PROGRESS_APPT, CANCELLED_APPT
 from ..models import Appointment
+from ..creators import AppointmentInProgressError
 from ..creators import InvalidParentAppointmentMissingVisitError
 from ..creators import InvalidParentAppointmentStatusError
 from ..creators import UnscheduledAppointmentCreator
@@ -135,3 +139,75 @@ class TestUnscheduledAppointmentCreator(TestCase):
                 new_appointment.appt_status = INCOMPLETE_APPT
                 new_appointment.save()
                 self.assertEqual(new_appointment.appt_status, INCOMPLETE_APPT)
+
+    def test_only_one_appointment_in_progress(self):
+        self.helper.consent_and_put_on_schedule()
+        appointments = [obj for obj in Appointment.objects.all().order_by("timepoint")]
+        appointments[0].appt_status = IN_PROGRESS_APPT
+        appointments[0].save()
+        appointment = appointments[1]
+        appointment.appt_status = IN_PROGRESS_APPT
+        with transaction.atomic():
+            self.assertRaises(IntegrityError, appointment.save)
+
+    def test_unscheduled_raises_if_appointment_in_progress(self):
+        self.helper.consent_and_put_on_schedule()
+        schedule_name = "schedule1"
+        appointments = [obj for obj in Appointment.objects.all().order_by("timepoint")]
+        for appointment in appointments[0:2]:
+            appointment.appt_status = IN_PROGRESS_APPT
+            appointment.save()
+            SubjectVisit.objects.create(
+                appointment=appointment, report_datetime=get_utcnow()
+            )
+            appointment.appt_status = INCOMPLETE_APPT
+            appointment.save()
+        appointments[0].appt_status = IN_PROGRESS_APPT
+        appointments[0].save()
+        with self.assertRaises(AppointmentInProgressError) as cm:
+            UnscheduledAppointmentCreator(
+                subject_identifier=self.subject_identifier,
+                visit_schedule_name=visit_schedule1.name,
+                schedule_name=schedule_name,
+                visit_code=appointments[1].visit_code,
+                facility=appointments[1].facility,
+            )
+        self.assertIn(f"{appointments[0].visit_code}.0", str(cm.exception))
+
+    def test_in_progress_constraint_enforced(self):
+        self.assertEqual(
+            Appointment.in_progress_constraint_enforced(),
+            connection.features.supports_partial_indexes,
+        )
+
+    def test_unscheduled_checks_in_progress_if_constraint_not_enforced(self):
+        self.helper.consent_and_put_on_schedule()
+        appointments = [obj for obj in Appointment.objects.all().order_by("timepoint")]
+        for appointment in appointments[0:2]:
+            appointment.appt_status = IN_PROGRESS_APPT
+            appointment.save()
+            SubjectVisit.objects.create(
+                appointment=appointment, report_datetime=get_utcnow()
+            )
+            appointment.appt_status = INCOMPLETE_APPT
+            appointment.save()
+        appointments[0].appt_status = IN_PROGRESS_APPT
+        appointments[0].save()
+        count = Appointment.objects.count()
+        with patch.object(
+            Appointment, "in_progress_constraint_enforced", return_value=False
+        ):
+            with patch.object(
+                UnscheduledAppointmentCreator, "appointment_creator_cls"
+            ) as appointment_creator_cls:
+                self.assertRaises(
+                    AppointmentInProgressError,
+                    UnscheduledAppointmentCreator,
+                    subject_identifier=self.subject_identifier,
+                    visit_schedule_name=visit_schedule1.name,
+                    schedule_name="schedule1",
+                    visit_code=appointments[1].visit_code,
+                    facility=appointments[1].facility,
+                )
+        appointment_creator_cls.assert_not_called()
+        self.assertEqual(Appointment.objects.count(), count)
@@ -80,20 +80,28 @@ class AppointmentViewMixin(ContextMixin):
         """Returns a Queryset of all appointments for this subject.
         """
         if not self._appointments:
-            self._appointments = self.appointment_model_cls.objects.filter(
-                subject_identifier=self.subject_identifier
-            ).order_by("timepoint", "visit_code_sequence")
+            self._appointments = (
+                self.appointment_model_cls.objects.get_read_queryset()
+                .filter(subject_identifier=self.subject_identifier)
+                .order_by("timepoint", "visit_code_sequence")
+            )
         return self._appointments
 
     @property
     def appointments_wrapped(self):
-        """Returns a list of wrapped appointments.
+        """Returns a list of wrapped appointments, from the
+        appointment list cache if enabled.
         """
         if not self._wrapped_appointments:
-            if self.appointments:
+            appointments = self.appointment_model_cls.objects.get_cached_appointments(
+                subject_identifier=self.subject_identifier
+            )
+            if appointments is None:
+                appointments = self.appointments
+            if appointments:
                 wrapped = [
                     self.appointment_model_wrapper_cls(model_obj=obj)
-                    for obj in self.appointments
+                    for obj in appointments
                 ]
                 for i in range(0, len(wrapped)):
                     if wrapped[i].appt_status == IN_PROGRESS_APPT:
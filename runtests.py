@@ -47,12 +47,29 @@ DEFAULT_SETTINGS = DefaultTestSettings(
     add_dashboard_middleware=True,
 ).settings
 
+# a second database to test routing reads to a replica, only
+# added for the routing tests, run with --replica
+REPLICA_DATABASE = dict(
+    DEFAULT_SETTINGS["DATABASES"]["default"],
+    NAME=os.path.join(base_dir, "replica.sqlite3"),
+    TEST={},
+)
+
 
 def main():
+    # benchmark tests are timing dependent, run with --benchmark
+    if "--benchmark" in sys.argv:
+        tags, exclude_tags = ["benchmark"], None
+    elif "--replica" in sys.argv:
+        tags, exclude_tags = ["replica"], None
+        DEFAULT_SETTINGS["DATABASES"]["replica"] = REPLICA_DATABASE
+    else:
+        tags, exclude_tags = None, ["benchmark", "replica"]
     if not settings.configured:
         settings.configure(**DEFAULT_SETTINGS)
     django.setup()
-    failures = DiscoverRunner(failfast=True).run_tests(
+    failures = DiscoverRunner(
+        failfast=True, tags=tags, exclude_tags=exclude_tags).run_tests(
         [f'{app_name}.tests'])
     sys.exit(failures)
 
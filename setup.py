@@ -41,10 +41,15 @@ setup(
         'edc-utils',
         'edc-visit-schedule',
         'edc-offstudy',
+        'django-simple-history>=2.10.0',
     ],
+    extras_require={
+        'parquet': ['pyarrow'],
+    },
     classifiers=[
         'Environment :: Web Environment',
         'Framework :: Django',
+        'Framework :: Django :: 2.2',
         'Intended Audience :: Developers',
         'Intended Audience :: Science/Research',
         'License :: OSI Approved :: GNU General Public License v3 (GPLv3)',